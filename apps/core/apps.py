@@ -1,7 +1,18 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = 'Core'
+
+    def ready(self):
+        from .metrics import install_query_recorder
+        connection_created.connect(install_query_recorder, dispatch_uid='core_query_recorder')
+
+        from django.conf import settings
+        if settings.TRACING_ENABLED:
+            from .tracing import install_query_tracer, install_tracing
+            install_tracing()
+            connection_created.connect(install_query_tracer, dispatch_uid='core_query_tracer')
@@ -0,0 +1,198 @@
+"""
+Multiplexed API requests.
+
+BatchView (POST /api/v1/core/batch/) takes a list of sub-requests and
+runs each through the URL resolver and its view directly, skipping the
+middleware stack. Sub-requests share the batch request's tenant and its
+authenticated user, so neither is resolved again:
+
+    {"requests": [
+        {"id": "profile", "path": "/api/v1/auth/profile/"},
+        {"id": "roles", "path": "/api/v1/auth/roles/?page=2"},
+        {"id": "rename", "method": "PATCH", "path": "/api/v1/auth/profile/",
+         "body": {"first_name": "Ada"}}
+    ]}
+
+Sub-requests run in order. Consecutive GET/HEAD/OPTIONS sub-requests run
+concurrently on up to BATCH_CONCURRENCY threads; each thread uses its own
+database connection set to the batch's tenant. Views setting
+batch_allowed = False (such as BatchView itself) can't be called in a
+batch.
+"""
+import contextvars
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.db import close_old_connections, connection
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, get_resolver
+from rest_framework.response import Response
+from .routers import SAFE_METHODS, finish_routing, start_routing, view_uses_replica
+from .tracing import span
+
+# Response headers returned with each sub-response.
+RETURNED_HEADERS = ('ETag', 'Last-Modified', 'Location', 'Retry-After')
+
+# Headers of the batch request not passed on to sub-requests; a
+# sub-request sets its own in `headers`.
+_REQUEST_SPECIFIC_META = (
+    'CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IDEMPOTENCY_KEY', 'HTTP_IF_MATCH',
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE',
+)
+
+# Headers a sub-request may not set.
+_SHARED_HEADERS = {'AUTHORIZATION', 'COOKIE', 'HOST'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.BATCH_CONCURRENCY, thread_name_prefix='batch')
+        return _executor
+
+
+class SubRequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def build_sub_request(request, spec):
+    """Return the HttpRequest for a sub-request of the DRF batch request."""
+    outer = request._request
+    parts = urlsplit(spec['path'])
+    method = spec['method']
+    body = b'' if spec.get('body') is None else json.dumps(spec['body']).encode()
+
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = parts.path
+    sub.META = {
+        key: value for key, value in outer.META.items() if key not in _REQUEST_SPECIFIC_META
+    }
+    sub.META.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'HTTP_ACCEPT': 'application/json',
+    })
+    if body:
+        sub.META.update({'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body))})
+    for name, value in (spec.get('headers') or {}).items():
+        name = name.upper().replace('-', '_')
+        if name not in _SHARED_HEADERS:
+            sub.META[f'HTTP_{name}'] = str(value)
+    sub._set_content_type_params(sub.META)
+    sub._stream = io.BytesIO(body)
+    sub._read_started = False
+    sub.GET = QueryDict(parts.query)
+    sub.COOKIES = outer.COOKIES
+
+    # Share the tenant and the user authenticated for the batch.
+    for attr in ('tenant', 'urlconf', 'session', 'request_id'):
+        if hasattr(outer, attr):
+            setattr(sub, attr, getattr(outer, attr))
+    sub.user = request.user
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    sub._dont_enforce_csrf_checks = True
+    return sub
+
+
+def _resolve(sub, spec):
+    try:
+        match = get_resolver(getattr(sub, 'urlconf', None)).resolve(sub.path_info)
+    except Resolver404:
+        raise SubRequestError(404, 'Not found')
+    view_class = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+    if getattr(view_class, 'batch_allowed', True) is False:
+        raise SubRequestError(400, 'This endpoint cannot be called in a batch')
+    return match
+
+
+def _result(spec, response):
+    result = {'id': spec.get('id'), 'status': response.status_code}
+    headers = {name: response[name] for name in RETURNED_HEADERS if response.has_header(name)}
+    if headers:
+        result['headers'] = headers
+    if isinstance(response, Response):
+        result['body'] = response.data
+    elif response.streaming:
+        result['body'] = None
+    elif response.get('Content-Type', '').startswith('application/json'):
+        result['body'] = json.loads(response.content) if response.content else None
+    else:
+        result['body'] = response.content.decode(response.charset, errors='replace') or None
+    return result
+
+
+def run_sub_request(request, spec):
+    """Run one sub-request and return its entry of the batch response."""
+    sub = build_sub_request(request, spec)
+    try:
+        match = _resolve(sub, spec)
+    except SubRequestError as exc:
+        return {'id': spec.get('id'), 'status': exc.status, 'body': {'error': exc.message}}
+    sub.resolver_match = match
+
+    state, token = start_routing(sub)
+    if not view_uses_replica(match.func):
+        state.enabled = False
+    view = match.func
+    if iscoroutinefunction(view):
+        # Async views (AsyncAPIView); Django's handler adapts them the same way.
+        view = async_to_sync(view)
+    try:
+        with span('batch.request', 'batch', method=sub.method, path=sub.path):
+            try:
+                return _result(spec, view(sub, *match.args, **match.kwargs))
+            except Exception as exc:
+                return _result(spec, response_for_exception(sub, exc))
+    finally:
+        finish_routing(state, token)
+
+
+def _run_in_thread(tenant, include_public, func, *args):
+    close_old_connections()
+    try:
+        if tenant is not None:
+            connection.set_tenant(tenant, include_public)
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def run_batch(request, specs):
+    """Run the sub-requests in order, the independent reads concurrently."""
+    results = []
+    index = 0
+    while index < len(specs):
+        end = index
+        while end < len(specs) and specs[end]['method'] in SAFE_METHODS:
+            end += 1
+        if end - index > 1 and settings.BATCH_CONCURRENCY > 1:
+            tenant = getattr(connection, 'tenant', None)
+            include_public = getattr(connection, 'include_public_schema', True)
+            futures = [
+                get_executor().submit(
+                    contextvars.copy_context().run,
+                    _run_in_thread, tenant, include_public, run_sub_request, request, spec
+                )
+                for spec in specs[index:end]
+            ]
+            results.extend(future.result() for future in futures)
+            index = end
+        else:
+            results.append(run_sub_request(request, specs[index]))
+            index += 1
+    return results
@@ -0,0 +1,389 @@
+"""
+Cache backends for EduCrowd.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django_redis.cache import RedisCache, omit_exception
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from .lru import LRUCache
+from .metrics import record_cache_lookup
+
+logger = logging.getLogger('educrowd')
+
+_MISSING = object()
+
+
+class InstrumentedRedisCache(RedisCache):
+    """
+    django-redis cache that counts hits and misses for request metrics.
+    """
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, default=_MISSING, version=version, client=client)
+        if value is _MISSING:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1, 0)
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        values = super().get_many(keys, version=version, client=client)
+        record_cache_lookup(len(values), len(keys) - len(values))
+        return values
+
+
+class _Tier:
+    """
+    In-process L1 entries and invalidation state of a TwoTierRedisCache.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.pid = os.getpid()
+        self.listening = False
+        self.entries = LRUCache(maxsize, ttl)
+        # Highest version invalidated per key, kept as long as an entry
+        # could live, which is as long as a late fill could matter.
+        self.invalidated = LRUCache(maxsize, ttl)
+
+    def clear(self):
+        self.entries.clear()
+        self.invalidated.clear()
+
+    def apply(self, payload):
+        """Apply an invalidation message."""
+        if payload.get('clear'):
+            self.clear()
+            return
+        for key, version in payload['keys'].items():
+            self.forget(key, version)
+
+    def forget(self, key, version):
+        self.entries.delete(key)
+        if version > self.invalidated.get(key, 0):
+            self.invalidated.set(key, version)
+
+    def fill(self, key, version, raw, ttl=None):
+        """
+        Store raw under key for ttl seconds (default: the tier's), unless a
+        newer write was already seen.
+        """
+        if ttl is not None and ttl <= 0:
+            return
+        if version >= self.invalidated.get(key, 0):
+            self.entries.set(key, (version, raw), ttl)
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TwoTierRedisCache(InstrumentedRedisCache):
+    """
+    Redis cache with a small in-process LRU (L1) in front of it.
+
+    Reads are served from L1 when possible. Every write goes to Redis, bumps
+    a per-key version counter and publishes the key on a pub/sub channel;
+    each process drops the key from its L1 when the message arrives.
+
+    The version closes the race between a reader filling L1 and a concurrent
+    write: the fill reads the version before the value, and a fill older
+    than the last invalidation seen for the key is not stored. L1 is only
+    used while the invalidation subscription is connected, and is emptied
+    whenever it reconnects since messages may have been missed.
+
+    An L1 entry never outlives the key in Redis: the fill reads its PTTL
+    too, and touch/expire/persist count as writes.
+
+    Extra OPTIONS:
+        L1_MAX_ENTRIES     entries kept per process (default 10000)
+        L1_TIMEOUT         seconds an L1 entry may live (default 30)
+        L1_CHANNEL         pub/sub channel for invalidations
+        L1_VERSION_TIMEOUT seconds a key's version counter is kept (default 86400)
+    """
+
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS', {}))
+        self._l1_max_entries = int(options.pop('L1_MAX_ENTRIES', 10000))
+        self._l1_timeout = float(options.pop('L1_TIMEOUT', 30))
+        self._l1_channel = options.pop('L1_CHANNEL', 'educrowd:cache:invalidate')
+        self._l1_version_timeout = int(options.pop('L1_VERSION_TIMEOUT', 86400))
+        params['OPTIONS'] = options
+        super().__init__(server, params)
+
+    @property
+    def _tier(self):
+        """
+        The L1 state of this process.
+
+        Django creates a backend instance per thread, so the state is kept
+        per (server, channel) and shared by all of them. A forked child
+        starts with a fresh one, since the subscriber thread doesn't survive
+        the fork.
+        """
+        name = (str(self._server), self._l1_channel)
+        tier = _tiers.get(name)
+        if tier is None or tier.pid != os.getpid():
+            with _tiers_lock:
+                tier = _tiers.get(name)
+                if tier is None or tier.pid != os.getpid():
+                    tier = _Tier(self._l1_max_entries, self._l1_timeout)
+                    _tiers[name] = tier
+                    threading.Thread(
+                        target=self._listen, args=(tier,),
+                        name='cache-invalidation', daemon=True,
+                    ).start()
+        return tier
+
+    def _listen(self, tier):
+        """Apply invalidation messages to L1, reconnecting on failure."""
+        backoff = 0.5
+        while tier.pid == os.getpid():
+            pubsub = None
+            try:
+                pubsub = self.client.get_client(write=True).pubsub()
+                pubsub.subscribe(self._l1_channel)
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        # Anything cached before now may have missed a message.
+                        tier.clear()
+                        tier.listening = True
+                        backoff = 0.5
+                    elif message['type'] == 'message':
+                        tier.apply(json.loads(message['data']))
+            except Exception:
+                logger.warning('Cache invalidation subscriber disconnected', exc_info=True)
+            finally:
+                tier.listening = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _version_key(self, cache_key):
+        return f'{cache_key}:l1v'
+
+    def _fetch(self, tier, cache_keys, client):
+        """Read (version, raw value) for each key from Redis and fill L1."""
+        pipe = client.pipeline(transaction=False)
+        for cache_key in cache_keys:
+            # Version first: a write landing in between makes the fill look
+            # older than it is, never newer.
+            pipe.get(self._version_key(cache_key))
+            pipe.get(cache_key)
+            pipe.pttl(cache_key)
+        try:
+            replies = pipe.execute()
+        except (RedisConnectionError, RedisTimeoutError) as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        found = {}
+        for index, cache_key in enumerate(cache_keys):
+            version, raw, pttl = replies[index * 3:index * 3 + 3]
+            if raw is None:
+                continue
+            found[cache_key] = raw
+            # PTTL is -1 for keys without an expiry, -2 if the key vanished.
+            ttl = self._l1_timeout if pttl == -1 else min(self._l1_timeout, pttl / 1000)
+            tier.fill(cache_key, int(version or 0), raw, ttl)
+        return found
+
+    @omit_exception
+    def _invalidate(self, cache_keys):
+        """Bump the versions of cache_keys and tell every process to drop them."""
+        cache_keys = [str(cache_key) for cache_key in cache_keys]
+        if not cache_keys:
+            return
+        client = self.client.get_client(write=True)
+        pipe = client.pipeline(transaction=False)
+        for cache_key in cache_keys:
+            pipe.incr(self._version_key(cache_key))
+            pipe.expire(self._version_key(cache_key), self._l1_version_timeout)
+        try:
+            replies = pipe.execute()
+            versions = dict(zip(cache_keys, replies[::2]))
+            client.publish(self._l1_channel, json.dumps({'keys': versions}))
+        except (RedisConnectionError, RedisTimeoutError) as e:
+            raise ConnectionInterrupted(connection=client) from e
+        tier = self._tier
+        for cache_key, version in versions.items():
+            tier.forget(cache_key, version)
+
+    @omit_exception
+    def _invalidate_all(self):
+        client = self.client.get_client(write=True)
+        try:
+            client.publish(self._l1_channel, json.dumps({'clear': True}))
+        except (RedisConnectionError, RedisTimeoutError) as e:
+            raise ConnectionInterrupted(connection=client) from e
+        self._tier.clear()
+
+    # Reads
+
+    def get(self, key, default=None, version=None, client=None):
+        tier = self._tier
+        if client is not None or not tier.listening:
+            return super().get(key, default=default, version=version, client=client)
+        value = self._get_two_tier(tier, key, version)
+        if value is _MISSING:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1, 0)
+        return value
+
+    @omit_exception(return_value=_MISSING)
+    def _get_two_tier(self, tier, key, version):
+        cache_key = str(self.client.make_key(key, version=version))
+        entry = tier.entries.get(cache_key)
+        if entry is not None:
+            return self.client.decode(entry[1])
+        found = self._fetch(tier, [cache_key], self.client.get_client(write=False))
+        if cache_key not in found:
+            return _MISSING
+        return self.client.decode(found[cache_key])
+
+    def get_many(self, keys, version=None, client=None):
+        tier = self._tier
+        if client is not None or not tier.listening:
+            return super().get_many(keys, version=version, client=client)
+        keys = list(keys)
+        values = self._get_many_two_tier(tier, keys, version)
+        record_cache_lookup(len(values), len(keys) - len(values))
+        return values
+
+    @omit_exception(return_value={})
+    def _get_many_two_tier(self, tier, keys, version):
+        cache_keys = {str(self.client.make_key(key, version=version)): key for key in keys}
+        raw_values = {}
+        misses = []
+        for cache_key in cache_keys:
+            entry = tier.entries.get(cache_key)
+            if entry is None:
+                misses.append(cache_key)
+            else:
+                raw_values[cache_key] = entry[1]
+        if misses:
+            raw_values.update(self._fetch(tier, misses, self.client.get_client(write=False)))
+        return {
+            cache_keys[cache_key]: self.client.decode(raw)
+            for cache_key, raw in raw_values.items()
+        }
+
+    def has_key(self, key, version=None, client=None):
+        tier = self._tier
+        if client is None and tier.listening:
+            if tier.entries.get(str(self.client.make_key(key, version=version))) is not None:
+                return True
+        return super().has_key(key, version=version, client=client)
+
+    # Writes
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, client=None, nx=False, xx=False):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().set(cache_key, value, timeout=timeout, client=client, nx=nx, xx=xx)
+        if result:
+            self._invalidate([cache_key])
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().add(cache_key, value, timeout=timeout, client=client)
+        if result:
+            self._invalidate([cache_key])
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        data = {self.client.make_key(key, version=version): value for key, value in data.items()}
+        result = super().set_many(data, timeout=timeout, client=client)
+        self._invalidate(data)
+        return result
+
+    def delete(self, key, version=None, prefix=None, client=None):
+        cache_key = self.client.make_key(key, version=version, prefix=prefix)
+        result = super().delete(cache_key, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def delete_many(self, keys, version=None, client=None):
+        cache_keys = [self.client.make_key(key, version=version) for key in keys]
+        result = super().delete_many(cache_keys, client=client)
+        self._invalidate(cache_keys)
+        return result
+
+    def delete_pattern(self, *args, **kwargs):
+        result = super().delete_pattern(*args, **kwargs)
+        self._invalidate_all()
+        return result
+
+    def incr(self, key, delta=1, version=None, client=None, ignore_key_check=False):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().incr(cache_key, delta=delta, client=client, ignore_key_check=ignore_key_check)
+        self._invalidate([cache_key])
+        return result
+
+    def decr(self, key, delta=1, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().decr(cache_key, delta=delta, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().touch(cache_key, timeout=timeout, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def expire(self, key, timeout, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().expire(cache_key, timeout, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def pexpire(self, key, timeout, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().pexpire(cache_key, timeout, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def expire_at(self, key, when, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().expire_at(cache_key, when, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def pexpire_at(self, key, when, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().pexpire_at(cache_key, when, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def persist(self, key, version=None, client=None):
+        cache_key = self.client.make_key(key, version=version)
+        result = super().persist(cache_key, client=client)
+        self._invalidate([cache_key])
+        return result
+
+    def incr_version(self, key, delta=1, version=None, client=None):
+        if version is None:
+            version = self.version
+        result = super().incr_version(key, delta=delta, version=version, client=client)
+        self._invalidate([
+            self.client.make_key(key, version=version),
+            self.client.make_key(key, version=version + delta),
+        ])
+        return result
+
+    def clear(self):
+        result = super().clear()
+        self._invalidate_all()
+        return result
@@ -0,0 +1,281 @@
+"""
+Cache helpers built on the default cache.
+
+get_or_compute() fills a cache entry with at most one caller computing it
+at a time, so an expiring hot value doesn't send every request to the
+database at once:
+
+    stats = get_or_compute(f'tenants:stats:{tenant.pk}', compute, timeout=60)
+
+The same is available as decorators for service functions (cached) and
+views (cached_view).
+
+Keys that belong to a tenant go through tenant_key(), which prefixes them
+with the tenant schema and a per-tenant generation. invalidate_tenant_cache()
+bumps the generation, which drops every key of the tenant at once; the old
+entries are never read again and expire on their own. tenant_cache offers
+the usual cache API on tenant keys of the current schema.
+"""
+import hashlib
+import logging
+import math
+import random
+import secrets
+import time
+from functools import wraps
+from django.core.cache import cache as default_cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import connection
+from django.http import HttpRequest
+from django_tenants.utils import get_public_schema_name
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+logger = logging.getLogger('educrowd')
+
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 2.0
+POLL_INTERVAL = 0.05
+
+
+class _Lock:
+    """
+    Non-blocking lock on a cache key.
+
+    Uses a Redis lock when the cache provides one (django-redis), and an
+    add()-based lock otherwise.
+    """
+
+    def __init__(self, cache, key, timeout):
+        self.cache = cache
+        self.key = f'{key}:lock'
+        self.timeout = timeout
+        self._lock = None
+        self._token = None
+
+    def acquire(self):
+        if hasattr(self.cache, 'lock'):
+            self._lock = self.cache.lock(self.key, timeout=self.timeout)
+            return self._lock.acquire(blocking=False)
+        self._token = secrets.token_hex(8)
+        return self.cache.add(self.key, self._token, self.timeout)
+
+    def release(self):
+        try:
+            if self._lock is not None:
+                self._lock.release()
+            elif self.cache.get(self.key) == self._token:
+                self.cache.delete(self.key)
+        except Exception:
+            # The lock expired while computing; someone else owns it now.
+            logger.warning('Cache lock %s expired before release', self.key)
+
+
+def _is_fresh(entry, beta):
+    """
+    Return False when the entry should be recomputed.
+
+    Besides expiry this implements probabilistic early refresh: the closer
+    the entry is to expiring, and the longer it took to compute, the more
+    likely a caller is to refresh it ahead of time.
+    """
+    value, delta, expires_at = entry
+    jitter = -delta * beta * math.log(1.0 - random.random())
+    return time.time() + jitter < expires_at
+
+
+def _store(cache, key, compute, timeout, stale_timeout):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    cache.set(key, (value, delta, time.time() + timeout), timeout + stale_timeout)
+    return value
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=None, beta=1.0,
+                   lock_timeout=LOCK_TIMEOUT, wait=WAIT_TIMEOUT, cache=None):
+    """
+    Return the cached value of key, calling compute() to fill it.
+
+    Only the caller holding the lock recomputes. Others get the previous
+    value while it is within stale_timeout (default: timeout) of expiring,
+    or wait up to `wait` seconds for the new one before computing it
+    themselves. beta scales early refresh; 0 turns it off.
+    """
+    cache = cache or default_cache
+    if stale_timeout is None:
+        stale_timeout = timeout
+
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, beta):
+        return entry[0]
+
+    lock = _Lock(cache, key, lock_timeout)
+    if lock.acquire():
+        try:
+            return _store(cache, key, compute, timeout, stale_timeout)
+        finally:
+            lock.release()
+
+    if entry is not None:
+        return entry[0]
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    logger.warning('Gave up waiting for %s to be computed', key)
+    return _store(cache, key, compute, timeout, stale_timeout)
+
+
+def current_schema():
+    """Return the schema of the tenant the current connection is set to."""
+    return getattr(connection, 'schema_name', None) or get_public_schema_name()
+
+
+def _generation_key(schema):
+    return f'tenant-generation:{schema}'
+
+
+def tenant_generation(schema=None, cache=None):
+    """Return the cache generation of a tenant (default: the current one)."""
+    cache = cache or default_cache
+    key = _generation_key(schema or current_schema())
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the clock rather than 1, so a generation lost to
+        # eviction can't come back and revive entries written under it.
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def tenant_key(key, schema=None, cache=None):
+    """Namespace key by a tenant schema (default: the current one)."""
+    schema = schema or current_schema()
+    return f't:{schema}:{tenant_generation(schema, cache)}:{key}'
+
+
+def invalidate_tenant_cache(schema=None, cache=None):
+    """Drop every tenant_key() entry of a tenant (default: the current one)."""
+    cache = cache or default_cache
+    schema = schema or current_schema()
+    try:
+        cache.incr(_generation_key(schema))
+    except ValueError:
+        # No generation yet, so nothing is cached under one either.
+        tenant_generation(schema, cache)
+
+
+class TenantCache:
+    """
+    Cache API whose keys are namespaced by the current tenant.
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache
+
+    @property
+    def cache(self):
+        return self._cache or default_cache
+
+    def key(self, key):
+        return tenant_key(key, cache=self.cache)
+
+    def get(self, key, default=None):
+        return self.cache.get(self.key(key), default)
+
+    def get_many(self, keys):
+        keys = {self.key(key): key for key in keys}
+        return {keys[key]: value for key, value in self.cache.get_many(keys).items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.cache.set(self.key(key), value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(self.key(key))
+
+    def get_or_compute(self, key, compute, timeout, **options):
+        return get_or_compute(self.key(key), compute, timeout, cache=self.cache, **options)
+
+    def clear(self):
+        """Drop every key of the current tenant."""
+        invalidate_tenant_cache(cache=self.cache)
+
+
+tenant_cache = TenantCache()
+
+
+def _default_key(func, args, kwargs):
+    digest = hashlib.md5(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+    return f'cached:{func.__module__}.{func.__qualname__}:{digest}'
+
+
+def cached(timeout, key=None, per_tenant=False, **options):
+    """
+    Decorate a function so its result goes through get_or_compute().
+
+    key is a callable receiving the function's arguments; by default the
+    key is derived from the function name and the repr of its arguments.
+    With per_tenant the key is namespaced by the current tenant.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else _default_key(func, args, kwargs)
+            if per_tenant:
+                cache_key = tenant_key(cache_key)
+            return get_or_compute(
+                cache_key, lambda: func(*args, **kwargs), timeout, **options
+            )
+        return wrapper
+    return decorator
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def _find_request(args):
+    for arg in args:
+        if isinstance(arg, (Request, HttpRequest)):
+            return arg
+    raise TypeError('cached_view could not find the request argument')
+
+
+def cached_view(timeout, key=None, per_user=True, **options):
+    """
+    Decorate a DRF view function or method so GET responses are cached.
+
+    Only the data of 200 responses is stored. The key is a tenant key of
+    the view, the full path and, with per_user, the user; a key callable
+    receiving the request replaces the path part.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = _find_request(args)
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            user = request.user.pk if per_user and request.user.is_authenticated else ''
+            part = key(request) if key else request.get_full_path()
+            digest = hashlib.md5(str(part).encode()).hexdigest()
+            cache_key = tenant_key(f'view:{view.__module__}.{view.__qualname__}:{user}:{digest}')
+
+            def compute():
+                response = view(*args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    raise _Uncacheable(response)
+                return response.data
+
+            try:
+                data = get_or_compute(cache_key, compute, timeout, **options)
+            except _Uncacheable as e:
+                return e.response
+            return Response(data)
+        return wrapper
+    return decorator
@@ -0,0 +1,98 @@
+"""
+Personal data export registry and archive writer.
+
+Apps declare what belongs to a user in an ``exports.py`` module:
+
+    from apps.core.exports import register
+
+    @register('profile')
+    def profile(user):
+        return UserProfile.objects.filter(user=user).values()
+
+Each function returns a values() queryset. Sources registered with
+tenant_scoped=True live in tenant schemas and are run once in the schema
+of every tenant the user holds a role in.
+"""
+import json
+import zipfile
+from collections import namedtuple
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import autodiscover_modules
+from django_tenants.utils import get_public_schema_name, schema_context
+
+EXPORT_CHUNK_SIZE = 2000
+
+ExportSource = namedtuple('ExportSource', ['name', 'func', 'tenant_scoped'])
+
+_registry = {}
+
+
+def register(name, tenant_scoped=False):
+    """Register a function returning a user's rows as an export source."""
+    def decorator(func):
+        _registry[name] = ExportSource(name, func, tenant_scoped)
+        return func
+    return decorator
+
+
+def get_sources():
+    """Return all registered export sources, loading every app's exports.py."""
+    autodiscover_modules('exports')
+    return list(_registry.values())
+
+
+def _plan(user):
+    """Return (archive member name, schema name, source) for every file."""
+    from apps.tenants.models import Tenant
+
+    public_schema = get_public_schema_name()
+    tenant_schemas = None
+    plan = []
+    for source in get_sources():
+        if not source.tenant_scoped:
+            plan.append((f'{source.name}.ndjson', public_schema, source))
+            continue
+        if tenant_schemas is None:
+            tenant_schemas = list(
+                Tenant.objects.filter(user_roles__user=user)
+                .exclude(schema_name=public_schema)
+                .values_list('schema_name', flat=True)
+                .distinct()
+            )
+        for schema_name in tenant_schemas:
+            plan.append((f'{schema_name}/{source.name}.ndjson', schema_name, source))
+    return plan
+
+
+def write_user_export(user, fileobj, progress=None):
+    """
+    Write a ZIP of NDJSON files with all of a user's rows to fileobj.
+
+    Rows are read through server-side cursors and compressed straight into
+    the archive, so memory use does not grow with the amount of data.
+    progress, if given, is called as progress(rows_written, total_rows)
+    after every chunk. Returns the number of rows written.
+    """
+    plan = _plan(user)
+
+    total = 0
+    for _, schema_name, source in plan:
+        with schema_context(schema_name):
+            total += source.func(user).count()
+
+    written = 0
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for member_name, schema_name, source in plan:
+            with schema_context(schema_name):
+                rows = source.func(user).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+                with archive.open(member_name, 'w', force_zip64=True) as member:
+                    for row in rows:
+                        member.write(json.dumps(row, cls=DjangoJSONEncoder).encode())
+                        member.write(b'\n')
+                        written += 1
+                        if progress is not None and written % EXPORT_CHUNK_SIZE == 0:
+                            progress(written, total)
+
+    if progress is not None:
+        progress(written, total)
+    return written
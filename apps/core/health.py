@@ -0,0 +1,157 @@
+"""
+Dependency probes for the deep health check.
+"""
+import threading
+import time
+import uuid
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor, wait
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from .lru import LRUCache
+
+# Overall budget for all probes, in seconds. Probes run concurrently, so
+# this bounds the response time of the endpoint.
+HEALTH_CHECK_TIMEOUT = 1.5
+
+# Reports are reused for this many seconds so that aggressive probing by
+# load balancers can't turn into load on the dependencies.
+HEALTH_CHECK_CACHE_TTL = 2
+
+_report_cache = LRUCache(maxsize=1, ttl=HEALTH_CHECK_CACHE_TTL)
+_report_lock = threading.Lock()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the thread pool the probes run on.
+
+    It has room for a second round of probes, so one wedged probe left
+    running in the background doesn't hold up the next report.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=len(PROBES) * 2, thread_name_prefix='health')
+        return _executor
+
+
+def probe_database():
+    """Run SELECT 1 on a fresh connection owned by the probe thread."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def probe_cache():
+    """Round-trip a key of its own through the default cache."""
+    key = f'health:probe:{uuid.uuid4().hex}'
+    value = str(time.monotonic())
+    try:
+        cache.set(key, value, timeout=10)
+        if cache.get(key) != value:
+            raise RuntimeError('cache returned a stale value')
+    finally:
+        cache.delete(key)
+
+
+def probe_broker():
+    """Open a connection to the Celery broker."""
+    from educrowd.celery import app
+    with app.connection_for_write() as conn:
+        conn.ensure_connection(max_retries=1, timeout=HEALTH_CHECK_TIMEOUT)
+
+
+def probe_workers():
+    """Ping Celery workers and require at least one to answer."""
+    from educrowd.celery import app
+    replies = app.control.ping(timeout=HEALTH_CHECK_TIMEOUT / 2)
+    if not replies:
+        raise RuntimeError('no Celery worker replied')
+
+
+# name -> (probe, critical). A failing critical dependency makes the whole
+# instance unhealthy; the others only degrade it, since the web tier can
+# still serve requests while the task queue is down.
+PROBES = {
+    'database': (probe_database, True),
+    'cache': (probe_cache, True),
+    'broker': (probe_broker, False),
+    'workers': (probe_workers, False),
+}
+
+
+def _timed(probe):
+    """Run a probe, returning (error or None, latency in ms)."""
+    started = time.perf_counter()
+    try:
+        probe()
+        error = None
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'
+    return error, round((time.perf_counter() - started) * 1000, 2)
+
+
+def run_probes():
+    """Run all probes concurrently and return a health report."""
+    executor = get_executor()
+    futures = {
+        name: executor.submit(_timed, probe)
+        for name, (probe, _) in PROBES.items()
+    }
+    # Never block on a wedged probe; its thread finishes in the background.
+    wait(futures.values(), timeout=HEALTH_CHECK_TIMEOUT)
+
+    checks = {}
+    status = 'healthy'
+    for name, future in futures.items():
+        critical = PROBES[name][1]
+        if future.done():
+            error, latency_ms = future.result()
+        else:
+            error, latency_ms = 'timed out', HEALTH_CHECK_TIMEOUT * 1000
+
+        check = {'status': 'healthy' if error is None else 'unhealthy', 'latency_ms': latency_ms}
+        if error is not None:
+            check['error'] = error
+            if critical:
+                status = 'unhealthy'
+            elif status == 'healthy':
+                status = 'degraded'
+        checks[name] = check
+
+    return {
+        'status': status,
+        'timestamp': timezone.now().isoformat(),
+        'checks': checks,
+    }
+
+
+def get_health_report():
+    """Return a recent health report, probing at most once per TTL."""
+    report = _report_cache.get('report')
+    if report is not None:
+        return report
+    with _report_lock:
+        report = _report_cache.get('report')
+        if report is None:
+            report = run_probes()
+            _report_cache.set('report', report)
+    return report
+
+
+async def aget_health_report():
+    """
+    Async version of get_health_report().
+
+    The probes run in their own threads either way; this only keeps the
+    calling request from holding a thread while it waits for them.
+    """
+    return await sync_to_async(get_health_report, thread_sensitive=False)()
@@ -0,0 +1,164 @@
+"""
+Idempotency keys for mutating requests.
+
+A client retrying a POST, PUT or PATCH sends the same Idempotency-Key
+header with every attempt. IdempotencyMiddleware runs the first attempt
+and stores its response in the cache for IDEMPOTENCY_TTL seconds, keyed
+by tenant, user and key; later attempts get the stored response back,
+marked with an Idempotent-Replayed header, without running the view.
+
+While the first attempt is still running, duplicates wait for it (up to
+IDEMPOTENCY_WAIT seconds, then 409) instead of running the view again.
+A key reused for a different request (method, path or body) gets 422.
+
+Only responses of a request that actually ran are stored. Server errors
+(5xx) and the 401, 403 and 429 answers given before the view runs
+(authentication, permissions, throttling) are not, so the request can be
+retried with the same key once the problem is gone.
+"""
+import hashlib
+import json
+import re
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .caching import _Lock
+
+IDEMPOTENT_METHODS = ('POST', 'PUT', 'PATCH')
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,255}$')
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+# Statuses (besides 5xx) of responses not stored: the view didn't run.
+_UNSTORED_STATUSES = {401, 403, 429}
+
+# Headers of the original response not sent with a replay.
+_SKIPPED_HEADERS = {'set-cookie', 'date', 'x-request-id'}
+
+_jwt_authentication = JWTAuthentication()
+
+
+def _error(status, message, **headers):
+    response = HttpResponse(
+        json.dumps({'error': message}), status=status, content_type='application/json'
+    )
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def request_user_id(request):
+    """
+    Return the ID of the user making the request, 'anon' for anonymous
+    requests, or None if its credentials are invalid.
+
+    Runs before DRF authentication, so bearer tokens are only validated,
+    not looked up.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return str(user.pk)
+    header = _jwt_authentication.get_header(request)
+    if header is None:
+        return 'anon'
+    raw_token = _jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        return 'anon'
+    try:
+        token = _jwt_authentication.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+    return str(token.get(jwt_settings.USER_ID_CLAIM))
+
+
+class IdempotentRequest:
+    """
+    A request carrying an idempotency key, and its stored response.
+    """
+
+    def __init__(self, request, schema, user_id, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        self.cache_key = f'idempotency:{schema}:{user_id}:{digest}'
+        if request.content_type.startswith('multipart/'):
+            # Reading an upload here would load it into memory.
+            body = request.META.get('CONTENT_LENGTH', '').encode()
+        else:
+            body = request.body
+        self.fingerprint = hashlib.sha256(
+            b'\n'.join((request.method.encode(), request.get_full_path().encode(), body))
+        ).hexdigest()
+        self.lock = _Lock(cache, self.cache_key, settings.IDEMPOTENCY_LOCK_TIMEOUT)
+
+    def attempt(self):
+        """
+        Return (True, None) if this request should run now, holding the
+        lock, (False, response) to replay a response, or (False, None) if
+        another attempt is running.
+        """
+        response = self.stored_response()
+        if response is not None:
+            return False, response
+        if not self.lock.acquire():
+            return False, None
+        # The running attempt may have finished since we looked.
+        response = self.stored_response()
+        if response is not None:
+            self.lock.release()
+            return False, response
+        return True, None
+
+    def stored_response(self):
+        """Return the response to replay, or None if there is none yet."""
+        entry = cache.get(self.cache_key)
+        if entry is None:
+            return None
+        if entry['fingerprint'] != self.fingerprint:
+            return _error(422, 'Idempotency-Key was already used for a different request')
+        response = HttpResponse(entry['content'], status=entry['status'])
+        for name, value in entry['headers']:
+            response[name] = value
+        response[REPLAYED_HEADER] = 'true'
+        return response
+
+    def store(self, response):
+        status = response.status_code
+        if response.streaming or status >= 500 or status in _UNSTORED_STATUSES:
+            return
+        cache.set(self.cache_key, {
+            'fingerprint': self.fingerprint,
+            'status': response.status_code,
+            'headers': [
+                (name, value) for name, value in response.items()
+                if name.lower() not in _SKIPPED_HEADERS
+            ],
+            'content': response.content,
+        }, settings.IDEMPOTENCY_TTL)
+
+
+def idempotent_request(request, schema):
+    """
+    Return an IdempotentRequest for the request, None if it carries no
+    idempotency key (or invalid credentials), or an error response for a
+    malformed key.
+    """
+    if request.method not in IDEMPOTENT_METHODS:
+        return None
+    key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+    if key is None:
+        return None
+    if not KEY_PATTERN.match(key):
+        return _error(400, 'Idempotency-Key must be 1-255 letters, digits or ._:-')
+    user_id = request_user_id(request)
+    if user_id is None:
+        # Let authentication reject the request; nothing to replay.
+        return None
+    return IdempotentRequest(request, schema, user_id, key)
+
+
+def conflict_response():
+    return _error(
+        409, 'A request with this Idempotency-Key is still being processed',
+        **{'Retry-After': str(max(int(settings.IDEMPOTENCY_WAIT), 1))}
+    )
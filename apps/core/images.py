@@ -0,0 +1,111 @@
+"""
+Image variant generation for uploaded avatars and logos.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from .lazy import LazyModule
+
+# Pillow is only needed by the Celery task rendering variants, not by the
+# serializers importing variant_urls().
+Image = LazyModule('PIL.Image')
+ImageOps = LazyModule('PIL.ImageOps')
+
+logger = logging.getLogger('educrowd')
+
+# Variant specs per image kind: (name, size, crop). Cropped variants are
+# cut to an exact square; the others are scaled down to fit inside it.
+IMAGE_VARIANT_SPECS = {
+    'avatar': [
+        ('small', 64, True),
+        ('medium', 128, True),
+        ('large', 256, True),
+    ],
+    'logo': [
+        ('small', 128, False),
+        ('large', 512, False),
+    ],
+}
+
+IMAGE_VARIANT_FORMATS = [
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+]
+
+
+def _flatten(image):
+    """Return an RGB copy of image, compositing transparency onto white."""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _resize(image, size, crop):
+    """Scale image to a size x size box, cropping or fitting inside it."""
+    if crop:
+        return ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    image = image.copy()
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return image
+
+
+def _store(content, directory, variant, extension):
+    """
+    Save encoded image bytes under a content-hashed name.
+
+    Identical output always maps to the same name, so an existing file is
+    reused as is and URLs can be cached forever.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:20]
+    name = posixpath.join(directory, f'{digest}-{variant}.{extension}')
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def generate_image_variants(field_file, kind):
+    """
+    Render the variants for kind from an uploaded image file.
+
+    EXIF orientation is applied and all metadata is dropped, since the
+    encoders are never handed the source's EXIF or ICC data. Returns a dict
+    mapping 'source' to the source file name and '<variant>_<extension>' to
+    the stored variant name, or None if the file is not a readable image.
+    """
+    directory = posixpath.join(posixpath.dirname(field_file.name), 'variants')
+    try:
+        with field_file.open('rb') as source:
+            image = Image.open(source)
+            image.load()
+    except (OSError, Image.DecompressionBombError) as exc:
+        logger.warning('Could not read image %s: %s', field_file.name, exc)
+        return None
+
+    image = _flatten(ImageOps.exif_transpose(image))
+    variants = {'source': field_file.name}
+    for variant, size, crop in IMAGE_VARIANT_SPECS[kind]:
+        resized = _resize(image, size, crop)
+        for extension, image_format, options in IMAGE_VARIANT_FORMATS:
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, **options)
+            variants[f'{variant}_{extension}'] = _store(
+                buffer.getvalue(), directory, variant, extension
+            )
+    return variants
+
+
+def variant_urls(variants, request=None):
+    """Map stored variant names to URLs, absolute when a request is given."""
+    urls = {}
+    for key, name in (variants or {}).items():
+        if key == 'source':
+            continue
+        url = default_storage.url(name)
+        urls[key] = request.build_absolute_uri(url) if request is not None else url
+    return urls
@@ -0,0 +1,14 @@
+"""
+Optional third-party integrations, imported on first use.
+
+Payment gateways and AI libraries are slow to import (transformers alone
+takes seconds) and most processes never touch them. Import them from here
+rather than directly so that web workers, Celery workers and management
+commands start without paying for them.
+"""
+from .lazy import LazyModule
+
+openai = LazyModule('openai')
+razorpay = LazyModule('razorpay')
+stripe = LazyModule('stripe')
+transformers = LazyModule('transformers')
@@ -0,0 +1,59 @@
+"""
+Deferred imports for heavy optional dependencies.
+
+Modules listed in HEAVY_MODULES take long to import and are only needed
+by a few code paths, so they must not be imported while Django starts.
+Code using them imports a LazyModule instead:
+
+    from apps.core.integrations import stripe
+
+    stripe.PaymentIntent.create(...)   # stripe is imported here
+
+`python manage.py profile_startup --check` fails when one of them is
+imported during startup.
+"""
+import importlib
+import threading
+
+HEAVY_MODULES = (
+    'openai',
+    'razorpay',
+    'stripe',
+    'tensorflow',
+    'torch',
+    'transformers',
+)
+
+
+class LazyModule:
+    """
+    Stand-in for a module that imports it on first attribute access.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<LazyModule '{self.__dict__['_name']}' ({state})>"
@@ -0,0 +1,225 @@
+"""
+Non-blocking structured logging.
+
+settings.LOGGING_CONFIG points at configure_logging(), which applies the
+LOGGING dict and then puts a bounded queue in front of the handlers of
+every configured logger. Records are formatted and written by a listener
+thread, so a slow disk or console never holds up a request. When the
+queue is full, records are dropped and counted rather than waited for.
+
+Before a record is queued it gets the request ID and tenant of the
+current request (see RequestLogMiddleware), and DEBUG records of loggers
+listed in LOG_SAMPLING are sampled. JSONFormatter writes one compact JSON
+object per line.
+"""
+import atexit
+import json
+import logging
+import logging.config
+import os
+import queue
+import random
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+_log_context = ContextVar('educrowd_log_context', default=None)
+
+# Attributes every LogRecord has; anything else was passed in `extra`.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'tenant',
+}
+
+
+def set_log_context(**context):
+    """Attach fields to every record logged in the current context; returns a token."""
+    return _log_context.set(context)
+
+
+def reset_log_context(token):
+    _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Add the request_id and tenant of the current context to records.
+    """
+
+    def filter(self, record):
+        context = _log_context.get() or {}
+        record.request_id = context.get('request_id')
+        record.tenant = context.get('tenant')
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the low-level records of some loggers.
+
+    rates maps logger names to the fraction kept; a name also covers its
+    child loggers. Records above max_level are always kept.
+    """
+
+    def __init__(self, rates=None, max_level=logging.DEBUG):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.max_level = max_level
+        self._resolved = {}
+
+    def rate(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition('.')[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as compact single-line JSON.
+
+    Fields passed in `extra` (such as latency_ms) are included as is.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in ('request_id', 'tenant'):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the queue is
+    full. The number dropped is kept in `dropped`, counted in Prometheus
+    and reported as logs_dropped on the next record that gets through.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__(queue.Queue(maxsize))
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record):
+        # Render the message and traceback here, where the arguments are
+        # still valid, but leave formatting to the listener's handlers.
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.acquire()
+        try:
+            if self.dropped > self._reported:
+                record.logs_dropped = self.dropped - self._reported
+        finally:
+            self.release()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.acquire()
+            try:
+                self.dropped += 1
+            finally:
+                self.release()
+            from .metrics import LOG_RECORDS_DROPPED
+            LOG_RECORDS_DROPPED.inc()
+        else:
+            self.acquire()
+            try:
+                self._reported += getattr(record, 'logs_dropped', 0)
+            finally:
+                self.release()
+
+
+_pipelines = []
+_pipelines_lock = threading.Lock()
+
+
+def _start_listener(handler, targets):
+    listener = QueueListener(handler.queue, *targets, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def _stop_listeners():
+    with _pipelines_lock:
+        for pipeline in _pipelines:
+            pipeline['listener'].stop()
+        _pipelines.clear()
+
+
+def _restart_listeners():
+    # Threads don't survive fork (gunicorn --preload, Celery prefork), and
+    # the queue's locks may have been held by the parent's listener.
+    for pipeline in _pipelines:
+        handler = pipeline['handler']
+        handler.queue = queue.Queue(handler.maxsize)
+        pipeline['listener'] = _start_listener(handler, pipeline['targets'])
+
+
+def configure_logging(config):
+    """
+    LOGGING_CONFIG callable: apply config, then route every configured
+    logger's handlers through a queue and a listener thread.
+    """
+    from django.conf import settings
+
+    logging.config.dictConfig(config)
+    _stop_listeners()
+
+    loggers = [logging.getLogger()] + [logging.getLogger(name) for name in config.get('loggers', {})]
+    handlers = {}
+    for logger in loggers:
+        targets = tuple(logger.handlers)
+        if not targets:
+            continue
+        if targets not in handlers:
+            handler = BoundedQueueHandler(settings.LOG_QUEUE_SIZE)
+            handler.addFilter(ContextFilter())
+            handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+            handlers[targets] = handler
+            _pipelines.append({
+                'handler': handler,
+                'targets': targets,
+                'listener': _start_listener(handler, targets),
+            })
+        logger.handlers = [handlers[targets]]
+
+
+atexit.register(_stop_listeners)
+os.register_at_fork(after_in_child=_restart_listeners)
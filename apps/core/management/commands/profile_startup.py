@@ -0,0 +1,195 @@
+"""
+Django management command to profile startup import time.
+
+Runs django.setup() in a fresh interpreter under `python -X importtime`
+and reports where the time goes, per installed app and per module:
+
+    python manage.py profile_startup
+    python manage.py profile_startup --with-urls --limit 40
+    python manage.py profile_startup --check
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.lazy import HEAVY_MODULES
+
+MARKER = 'profile_startup:'
+
+PROBE = '''
+import os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+sys.stderr.write({marker!r} + ' begin\\n')
+started = time.perf_counter()
+import django
+django.setup()
+if {with_urls!r}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+sys.stderr.write({marker!r} + ' %f\\n' % (time.perf_counter() - started))
+'''
+
+
+def parse_importtime(output):
+    """
+    Parse `-X importtime` output into a list of module records.
+
+    Each record has name, self_us, cumulative_us and parent (the module
+    whose import triggered it, or None). Only imports after the probe's
+    begin marker are kept.
+    """
+    modules = []
+    pending = []
+    seconds = None
+    started = False
+    for line in output.splitlines():
+        if line.startswith(MARKER):
+            value = line[len(MARKER):].strip()
+            if value == 'begin':
+                started = True
+            else:
+                seconds = float(value)
+            continue
+        if not started or not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # header
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        record = {
+            'name': raw_name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'parent': None,
+        }
+        # importtime prints children before their parent, one level deeper.
+        while pending and pending[-1][0] == depth + 1:
+            pending.pop()[1]['parent'] = record['name']
+        pending.append((depth, record))
+        modules.append(record)
+    return modules, seconds
+
+
+def owner(name, apps):
+    """Return the installed app a module belongs to, if any."""
+    best = None
+    for app in apps:
+        if (name == app or name.startswith(app + '.')) and (best is None or len(app) > len(best)):
+            best = app
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Report import time per app and per module during django.setup()'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--with-urls',
+            action='store_true',
+            help='Also load the URLconf (and so every view), as a worker does on its first request',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=25,
+            help='Number of modules to list (default: 25)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the report as JSON',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if a heavy optional module is imported at startup',
+        )
+
+    def handle(self, *args, **options):
+        probe = PROBE.format(
+            settings_module=os.environ.get('DJANGO_SETTINGS_MODULE', 'educrowd.settings'),
+            marker=MARKER,
+            with_urls=options['with_urls'],
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', probe],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        modules, seconds = parse_importtime(result.stderr)
+        if result.returncode != 0 or seconds is None:
+            tail = '\n'.join(result.stderr.splitlines()[-20:])
+            raise CommandError(f'Startup failed:\n{tail}')
+
+        apps = [app.split('.apps.')[0] for app in settings.INSTALLED_APPS]
+        per_app = defaultdict(int)
+        for record in modules:
+            app = owner(record['name'], apps)
+            # Count each entry into the app once: its cumulative time
+            # includes whatever the app's own modules import.
+            if app and (record['parent'] is None or owner(record['parent'], apps) != app):
+                per_app[app] += record['cumulative_us']
+            elif app is None and record['parent'] is None:
+                # Django itself and libraries imported at run time, e.g.
+                # from an app's ready().
+                per_app['(other)'] += record['cumulative_us']
+
+        heavy = sorted({
+            record['name'] for record in modules
+            if record['name'].split('.')[0] in HEAVY_MODULES
+        })
+        report = {
+            'seconds': round(seconds, 3),
+            'modules_imported': len(modules),
+            'apps': [
+                {'app': app, 'ms': round(us / 1000, 1)}
+                for app, us in sorted(per_app.items(), key=lambda item: -item[1])
+            ],
+            'modules': [
+                {
+                    'module': record['name'],
+                    'self_ms': round(record['self_us'] / 1000, 1),
+                    'cumulative_ms': round(record['cumulative_us'] / 1000, 1),
+                    'imported_by': record['parent'],
+                }
+                for record in sorted(modules, key=lambda record: -record['self_us'])[:options['limit']]
+            ],
+            'heavy_modules': heavy,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report, options['with_urls'])
+
+        if options['check'] and heavy:
+            raise CommandError(
+                'Heavy modules imported at startup: ' + ', '.join(heavy)
+                + '. Import them through apps.core.integrations instead.'
+            )
+
+    def write_report(self, report, with_urls):
+        phase = 'django.setup() and URL loading' if with_urls else 'django.setup()'
+        self.stdout.write(
+            f"{phase}: {report['seconds'] * 1000:.0f}ms, {report['modules_imported']} modules imported\n"
+        )
+
+        self.stdout.write('Per app (cumulative, including what the app imports first):')
+        for row in report['apps']:
+            self.stdout.write(f"  {row['ms']:>8.1f}ms  {row['app']}")
+
+        self.stdout.write(f"\nSlowest {len(report['modules'])} modules (own time):")
+        for row in report['modules']:
+            self.stdout.write(
+                f"  {row['self_ms']:>8.1f}ms  {row['cumulative_ms']:>8.1f}ms cumulative  "
+                f"{row['module']}  <- {row['imported_by'] or '-'}"
+            )
+
+        if report['heavy_modules']:
+            self.stdout.write(self.style.ERROR(
+                '\nHeavy modules imported at startup: ' + ', '.join(report['heavy_modules'])
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nNo heavy optional modules imported at startup'))
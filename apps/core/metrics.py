@@ -0,0 +1,190 @@
+"""
+Prometheus metrics for request profiling and Celery queues.
+
+Metrics are kept by prometheus_client. Under gunicorn, point the
+PROMETHEUS_MULTIPROC_DIR environment variable at an empty directory
+shared by the workers so that every scrape sees all of them.
+"""
+import os
+import time
+from contextvars import ContextVar
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess, start_http_server
+)
+
+LABELS = ['view', 'tenant']
+
+REQUEST_LATENCY = Histogram(
+    'educrowd_http_request_duration_seconds',
+    'Time spent handling a request.',
+    LABELS + ['method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSE_SIZE = Histogram(
+    'educrowd_http_response_size_bytes',
+    'Size of response bodies.',
+    LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+DB_QUERIES = Histogram(
+    'educrowd_db_queries_per_request',
+    'Number of database queries run by a request.',
+    LABELS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+DB_TIME = Histogram(
+    'educrowd_db_time_seconds',
+    'Time a request spent waiting on database queries.',
+    LABELS,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'educrowd_cache_requests',
+    'Cache lookups made while handling requests.',
+    LABELS + ['result'],
+)
+
+TASK_LABELS = ['queue', 'task']
+
+TASKS_PUBLISHED = Counter(
+    'educrowd_celery_tasks_published',
+    'Tasks sent to a queue.',
+    TASK_LABELS,
+)
+TASKS_FINISHED = Counter(
+    'educrowd_celery_tasks_finished',
+    'Tasks run by workers, by outcome.',
+    TASK_LABELS + ['state'],
+)
+TASK_DURATION = Histogram(
+    'educrowd_celery_task_duration_seconds',
+    'Time a worker spent running a task.',
+    ['queue'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+TASK_WAIT = Histogram(
+    'educrowd_celery_task_wait_seconds',
+    'Time a task spent in its queue before a worker started it.',
+    ['queue'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    'educrowd_log_records_dropped',
+    'Log records dropped because the logging queue was full.',
+)
+
+
+class RequestStats:
+    """
+    Counters collected while a single request is handled.
+    """
+    __slots__ = ('queries', 'query_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+_current_stats = ContextVar('educrowd_request_stats', default=None)
+
+
+def get_request_stats():
+    """Return the stats of the request being handled, if any."""
+    return _current_stats.get()
+
+
+def start_request_stats():
+    """Begin collecting stats for a request; returns (stats, token)."""
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def finish_request_stats(token):
+    """Stop collecting stats for the current request."""
+    _current_stats.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing queries of the current request."""
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    connection_created receiver installing record_query on the connection.
+
+    The wrapper stays on the connection for good and finds the request
+    through a context variable, so queries are counted in whatever thread
+    runs them, including the sync threads of async views. It goes first in
+    the list, since execute_wrapper() blocks pop from the end.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def record_cache_lookup(hits, misses):
+    """Count cache hits and misses against the current request."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+def observe_request(stats, view, tenant, method, status, duration, size):
+    """Record the metrics of a finished request."""
+    REQUEST_LATENCY.labels(view, tenant, method, status).observe(duration)
+    if size is not None:
+        RESPONSE_SIZE.labels(view, tenant).observe(size)
+    DB_QUERIES.labels(view, tenant).observe(stats.queries)
+    DB_TIME.labels(view, tenant).observe(stats.query_time)
+    if stats.cache_hits:
+        CACHE_REQUESTS.labels(view, tenant, 'hit').inc(stats.cache_hits)
+    if stats.cache_misses:
+        CACHE_REQUESTS.labels(view, tenant, 'miss').inc(stats.cache_misses)
+
+
+def record_task_published(queue, task):
+    """Count a task sent to a queue."""
+    TASKS_PUBLISHED.labels(queue, task).inc()
+
+
+def observe_task(queue, task, state, duration, wait=None):
+    """Record the metrics of a task run by a worker."""
+    TASKS_FINISHED.labels(queue, task, state).inc()
+    TASK_DURATION.labels(queue).observe(duration)
+    if wait is not None:
+        TASK_WAIT.labels(queue).observe(wait)
+
+
+def _registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics():
+    """Return (body, content type) of all metrics in Prometheus text format."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def serve_metrics(port):
+    """
+    Serve the metrics over HTTP on port, for processes without a web
+    endpoint such as Celery workers. With a prefork pool, set
+    PROMETHEUS_MULTIPROC_DIR so the pool processes' metrics are included.
+    """
+    start_http_server(port, registry=_registry())
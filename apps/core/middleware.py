@@ -0,0 +1,316 @@
+"""
+Middleware for core app.
+"""
+import asyncio
+import logging
+import re
+import time
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from .idempotency import conflict_response, idempotent_request
+from .logs import reset_log_context, set_log_context
+from .metrics import finish_request_stats, observe_request, start_request_stats
+from .routers import finish_routing, start_routing, view_uses_replica
+from .tracing import finish_trace, start_trace
+
+
+def get_view_label(request):
+    """Return the resolved URL name of a request, for use as a metric label."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or '<unnamed>'
+
+
+def get_tenant_label(request):
+    """Return the schema name of the request's tenant."""
+    tenant = getattr(request, 'tenant', None)
+    return getattr(tenant, 'schema_name', None) or '<none>'
+
+
+request_logger = logging.getLogger('educrowd.request')
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def get_request_id(request):
+    """
+    Return the request's ID: the X-Request-ID header set by the proxy if
+    valid, else a generated one. Stored on request.request_id.
+    """
+    request_id = getattr(request, 'request_id', None)
+    if request_id is None:
+        request_id = request.META.get('HTTP_X_REQUEST_ID', '')
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+    return request_id
+
+
+class TracingMiddleware:
+    """
+    Trace each request, using its request ID as the trace ID.
+
+    See apps.core.tracing. Place it first, so the time spent in every other
+    middleware is part of the trace. Works in both sync and async
+    middleware chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        return start_trace(get_request_id(request), request.path, method=request.method, path=request.path)
+
+    def finish(self, request, response, trace, token):
+        if trace is not None:
+            trace.name = get_view_label(request)
+            trace.attrs.update(
+                tenant=get_tenant_label(request),
+                status=response.status_code if response is not None else None,
+            )
+        finish_trace(trace, token)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        trace, token = self.start(request)
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(request, response, trace, token)
+        return response
+
+    async def __acall__(self, request):
+        trace, token = self.start(request)
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(request, response, trace, token)
+        return response
+
+
+class RequestLogMiddleware:
+    """
+    Tag log records with a request ID and tenant, and log each request.
+
+    The ID comes from the X-Request-ID header set by the proxy, or is
+    generated, and is returned in the response's X-Request-ID header.
+    Place it right after the tenant middleware. Works in both sync and
+    async middleware chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        return set_log_context(request_id=get_request_id(request), tenant=get_tenant_label(request))
+
+    def finish(self, request, response, duration):
+        response['X-Request-ID'] = request.request_id
+        request_logger.info(
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'latency_ms': round(duration * 1000, 2),
+                'view': get_view_label(request),
+            }
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self.start(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            self.finish(request, response, time.perf_counter() - started)
+        finally:
+            reset_log_context(token)
+        return response
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            self.finish(request, response, time.perf_counter() - started)
+        finally:
+            reset_log_context(token)
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, query, cache and response size metrics per request.
+
+    Place it right after the tenant middleware and before CommonMiddleware,
+    which sets the Content-Length read for the response size. Works in both
+    sync and async middleware chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token = start_request_stats()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request_stats(token)
+        self.observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token = start_request_stats()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request_stats(token)
+        self.observe(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, stats, duration):
+        size = response.get('Content-Length')
+        observe_request(
+            stats,
+            get_view_label(request),
+            get_tenant_label(request),
+            request.method,
+            f'{response.status_code // 100}xx',
+            duration,
+            int(size) if size else None,
+        )
+
+
+class ReplicaMiddleware:
+    """
+    Route the reads of safe requests to the read replicas.
+
+    See apps.core.routers. Place it right after the tenant middleware so
+    that everything below it, including authentication, is routed. Works
+    in both sync and async middleware chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state, token = start_routing(request)
+        request._db_routing = state
+        try:
+            return self.get_response(request)
+        finally:
+            finish_routing(state, token)
+
+    async def __acall__(self, request):
+        state, token = start_routing(request)
+        request._db_routing = state
+        try:
+            return await self.get_response(request)
+        finally:
+            finish_routing(state, token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not view_uses_replica(view_func):
+            request._db_routing.enabled = False
+        return None
+
+
+class IdempotencyMiddleware:
+    """
+    Replay the stored response of POST, PUT and PATCH requests retried
+    with the same Idempotency-Key header.
+
+    See apps.core.idempotency. Place it after AuthenticationMiddleware.
+    Works in both sync and async middleware chains.
+    """
+    sync_capable = True
+    async_capable = True
+    poll_interval = 0.05
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        idempotent = idempotent_request(request, get_tenant_label(request))
+        if idempotent is None:
+            return self.get_response(request)
+        if isinstance(idempotent, HttpResponse):
+            return idempotent
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        while True:
+            run, response = idempotent.attempt()
+            if response is not None:
+                return response
+            if run:
+                try:
+                    response = self.get_response(request)
+                    idempotent.store(response)
+                finally:
+                    idempotent.lock.release()
+                return response
+            if time.monotonic() >= deadline:
+                return conflict_response()
+            time.sleep(self.poll_interval)
+
+    async def __acall__(self, request):
+        idempotent = idempotent_request(request, get_tenant_label(request))
+        if idempotent is None:
+            return await self.get_response(request)
+        if isinstance(idempotent, HttpResponse):
+            return idempotent
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        while True:
+            run, response = idempotent.attempt()
+            if response is not None:
+                return response
+            if run:
+                try:
+                    response = await self.get_response(request)
+                    idempotent.store(response)
+                finally:
+                    idempotent.lock.release()
+                return response
+            if time.monotonic() >= deadline:
+                return conflict_response()
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,139 @@
+"""
+Reusable DRF view mixins.
+"""
+import hashlib
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from .serializers import EXPAND_PARAM, FIELDS_PARAM, DynamicFieldsMixin
+
+
+class ConditionalRequestMixin:
+    """
+    ETag / Last-Modified support for single-object generic views.
+
+    Before the object is loaded or serialized, the fields named in
+    etag_fields are fetched for it with a single values_list() query and
+    hashed into a strong ETag, with last_modified_field as Last-Modified.
+    A GET whose If-None-Match or If-Modified-Since still matches gets an
+    empty 304, and a PUT/PATCH whose If-Match or If-Unmodified-Since no
+    longer matches gets a 412 instead of overwriting a newer version.
+
+    List every field the representation depends on in etag_fields (for
+    example the updated_at of nested objects). The representation picked
+    with ?fields= and ?expand= is part of the ETag, so a trimmed copy never
+    validates the full one. Object-level permissions are
+    not checked before answering 304/412, so only use this on views that
+    have none.
+    """
+    etag_fields = ('pk', 'updated_at')
+    last_modified_field = 'updated_at'
+
+    def get_condition_queryset(self):
+        """Return a queryset narrowed down to the requested object."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_condition(self):
+        """Return (etag, last_modified) for the object, or None if it is missing."""
+        queryset = self.get_condition_queryset()
+        fields = list(self.etag_fields)
+        if self.last_modified_field not in fields:
+            fields.append(self.last_modified_field)
+        row = queryset.values_list(*fields).first()
+        if row is None:
+            return None
+
+        values = dict(zip(fields, row))
+        key = (queryset.model._meta.label, row)
+        representation = self.get_representation()
+        if representation:
+            key += (representation,)
+        digest = hashlib.md5(repr(key).encode(), usedforsecurity=False).hexdigest()
+        return quote_etag(digest), values[self.last_modified_field]
+
+    def get_representation(self):
+        """
+        Return the normalized ?fields= and ?expand= of a GET, which select
+        the representation (see DynamicFieldsMixin).
+        """
+        if self.request.method not in SAFE_METHODS:
+            return ()
+        params = self.request.query_params
+        return tuple(
+            (name, tuple(sorted({item.strip() for item in params[name].split(',') if item.strip()})))
+            for name in (FIELDS_PARAM, EXPAND_PARAM) if params.get(name)
+        )
+
+    def evaluate_preconditions(self, request):
+        """
+        Return a 304/412 response if the request's preconditions say so.
+
+        Returns (response, condition); response is None when the view
+        should go on and handle the request.
+        """
+        condition = self.get_condition()
+        if condition is None:
+            return None, None
+
+        etag, last_modified = condition
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            self.set_condition_headers(response, condition)
+        return response, condition
+
+    def set_condition_headers(self, response, condition):
+        """Set ETag and Last-Modified on a response."""
+        etag, last_modified = condition
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve the object unless the client's copy is current."""
+        response, condition = self.evaluate_preconditions(request)
+        if response is not None:
+            return response
+
+        response = super().retrieve(request, *args, **kwargs)
+        if condition is not None:
+            self.set_condition_headers(response, condition)
+        return response
+
+    def update(self, request, *args, **kwargs):
+        """Update the object unless the client edited a stale copy."""
+        response, condition = self.evaluate_preconditions(request)
+        if response is not None:
+            return response
+
+        response = super().update(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            condition = self.get_condition()
+            if condition is not None:
+                self.set_condition_headers(response, condition)
+        return response
+
+
+class FieldSelectionMixin:
+    """
+    Fetch only what the serializer returns, for generic views whose
+    serializer uses DynamicFieldsMixin.
+
+    The filtered queryset of GET requests goes through the serializer's
+    optimize_queryset(), so ?fields= and ?expand= narrow the columns
+    loaded, the joins and the annotations as well as the payload.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS:
+            serializer = self.get_serializer()
+            if isinstance(serializer, DynamicFieldsMixin):
+                queryset = serializer.optimize_queryset(queryset)
+        return queryset
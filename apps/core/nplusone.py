@@ -0,0 +1,179 @@
+"""
+N+1 query detection for development and tests.
+
+Queries are grouped by their normalized SQL and the line of project code
+that triggered them. A group repeating more than the threshold is almost
+always a lazy relation being loaded once per row, typically by a
+serializer field; the report names that field.
+
+In tests:
+
+    from apps.core.nplusone import detect_n_plus_one
+
+    with detect_n_plus_one(threshold=3):
+        client.get('/api/v1/auth/roles/')
+"""
+import logging
+import re
+import sys
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('educrowd')
+
+DEFAULT_THRESHOLD = 5
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+
+# Request and query plumbing that runs around every query; a call site in
+# one of these says nothing about which view or serializer caused it.
+_INFRASTRUCTURE_FILES = frozenset(
+    str(Path(__file__).with_name(name).resolve())
+    for name in (
+        'nplusone.py', 'middleware.py', 'tracing.py', 'cache.py', 'caching.py',
+        'routers.py', 'logs.py', 'metrics.py', 'batch.py', 'idempotency.py',
+        'taskbase.py',
+    )
+)
+
+
+class NPlusOneError(AssertionError):
+    """
+    Raised when a statement repeats more often than allowed.
+    """
+
+
+def normalize_sql(sql):
+    """Replace literals and placeholders so repeated statements compare equal."""
+    sql = sql.replace('%s', '?')
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PLACEHOLDER_LIST_RE.sub('(...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def _inspect_stack():
+    """
+    Return (call site, serializer field) for the query being executed.
+
+    The call site is the innermost frame in project code outside the
+    request infrastructure in apps/core. The serializer
+    field is found from the innermost Serializer.to_representation frame,
+    whose loop variable names the field being rendered.
+    """
+    from rest_framework.serializers import Serializer
+
+    call_site = None
+    serializer_field = None
+    frame = sys._getframe(2)
+    while frame is not None and (call_site is None or serializer_field is None):
+        code = frame.f_code
+        if call_site is None:
+            filename = code.co_filename
+            if (filename.startswith(_PROJECT_DIR) and filename not in _INFRASTRUCTURE_FILES
+                    and 'site-packages' not in filename):
+                call_site = f'{Path(filename).relative_to(_PROJECT_DIR)}:{frame.f_lineno} in {code.co_name}'
+        if serializer_field is None and code.co_name == 'to_representation':
+            serializer = frame.f_locals.get('self')
+            field = frame.f_locals.get('field')
+            if isinstance(serializer, Serializer) and field is not None:
+                serializer_field = f'{type(serializer).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return call_site or '<unknown>', serializer_field
+
+
+class NPlusOneDetector:
+    """
+    Database execute wrapper that groups repeated SELECT statements.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.groups = defaultdict(lambda: {'count': 0, 'fields': set()})
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            call_site, serializer_field = _inspect_stack()
+            group = self.groups[(normalize_sql(sql), call_site)]
+            group['count'] += 1
+            if serializer_field:
+                group['fields'].add(serializer_field)
+        return execute(sql, params, many, context)
+
+    def problems(self):
+        """Return the groups that repeated more than the threshold."""
+        return [
+            {
+                'sql': sql,
+                'call_site': call_site,
+                'count': group['count'],
+                'fields': sorted(group['fields']),
+            }
+            for (sql, call_site), group in self.groups.items()
+            if group['count'] > self.threshold
+        ]
+
+    def format_report(self, label):
+        """Describe the problems found, or return '' if there are none."""
+        lines = []
+        for problem in self.problems():
+            lines.append(
+                f"{label}: query repeated {problem['count']} times at {problem['call_site']}"
+            )
+            if problem['fields']:
+                lines.append(f"  serializer field: {', '.join(problem['fields'])}")
+            lines.append(f"  {problem['sql'][:300]}")
+        return '\n'.join(lines)
+
+    def check(self, label, mode='warn'):
+        """Log the report in 'warn' mode, raise NPlusOneError in 'raise' mode."""
+        report = self.format_report(label)
+        if not report:
+            return
+        if mode == 'raise':
+            raise NPlusOneError(report)
+        logger.warning('Possible N+1 queries\n%s', report)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=DEFAULT_THRESHOLD, mode='raise', label='block'):
+    """
+    Watch the queries run inside the block on all database connections.
+
+    Fails with NPlusOneError (or logs a warning with mode='warn') when the
+    same statement from the same call site runs more than threshold times.
+    """
+    detector = NPlusOneDetector(threshold)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(detector))
+        yield detector
+    detector.check(label, mode)
+
+
+class NPlusOneMiddleware:
+    """
+    Check every request for N+1 queries.
+
+    Enabled with the NPLUSONE_DETECTION setting ('warn' or 'raise'), with
+    NPLUSONE_THRESHOLD as the number of repeats allowed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mode = getattr(settings, 'NPLUSONE_DETECTION', 'warn')
+        self.threshold = getattr(settings, 'NPLUSONE_THRESHOLD', DEFAULT_THRESHOLD)
+
+    def __call__(self, request):
+        label = f'{request.method} {request.path}'
+        with detect_n_plus_one(self.threshold, self.mode, label):
+            response = self.get_response(request)
+        return response
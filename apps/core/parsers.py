@@ -0,0 +1,37 @@
+"""
+Parsers for EduCrowd API requests.
+"""
+import io
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser backed by orjson.
+
+    Falls back to DRF's stdlib parser when orjson is not installed, for
+    bodies not encoded as UTF-8, and for NaN/Infinity constants when
+    STRICT_JSON is off.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError as exc:
+            if not self.strict:
+                try:
+                    return super().parse(io.BytesIO(body), media_type, parser_context)
+                except ParseError:
+                    pass
+            raise ParseError('JSON parse error - %s' % str(exc))
+
@@ -0,0 +1,37 @@
+"""
+Renderers for EduCrowd API responses.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+if orjson is not None:
+    # Datetimes, dates, times and UUIDs are handled natively and come out
+    # as DRF's encoder writes them; everything else (Decimals, lazy
+    # translation strings, querysets, ...) goes through DRF's encoder.
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    orjson_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson, producing the same output as DRF's.
+
+    Falls back to DRF's stdlib renderer when orjson is not installed and
+    for pretty-printed, ASCII-only or non-compact output.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (data is None or orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=orjson_default, option=ORJSON_OPTIONS)
+        # Keep the output a strict JavaScript subset, like DRF does.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
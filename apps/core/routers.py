@@ -0,0 +1,166 @@
+"""
+Database routing to read replicas.
+
+ReplicaRouter sends reads to the aliases in REPLICA_DATABASES, but only
+where that is safe:
+
+- inside a request routed by ReplicaMiddleware, or a use_replica() block,
+  and for GET, HEAD and OPTIONS requests only;
+- not once the request has written, nor inside a transaction on the
+  primary, nor for views that opt out (primary_db, or use_replica = False
+  on the view class);
+- not for a user who wrote in the last REPLICA_PIN_SECONDS, so they
+  always read their own writes even while the replica lags.
+
+Everything else, including Celery tasks and management commands, reads
+from the primary. Replica connections get the search_path of the tenant
+the primary connection is set to.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """
+    Replica routing decisions for a single request or use_replica() block.
+    """
+    __slots__ = ('request', 'enabled', 'wrote', 'pinned', 'replica')
+
+    def __init__(self, request=None, enabled=True):
+        self.request = request
+        self.enabled = enabled
+        self.wrote = False
+        self.pinned = None if request is not None else False
+        self.replica = None
+
+
+_current_state = ContextVar('educrowd_db_routing', default=None)
+
+
+def pin_key(user_pk):
+    return f'db-pin:{user_pk}'
+
+
+def _request_user(request):
+    """Return the request's user if authentication already ran, else None."""
+    user = request.__dict__.get('user')
+    if user is None or type(user) is SimpleLazyObject:
+        # Not authenticated yet; resolving it here would itself read.
+        return None
+    return user
+
+
+def _is_pinned(state):
+    if state.pinned is None:
+        user = _request_user(state.request)
+        if user is None:
+            return False
+        state.pinned = bool(user.is_authenticated and cache.get(pin_key(user.pk)))
+    return state.pinned
+
+
+def _sync_tenant(alias):
+    """Give the replica connection the tenant of the primary connection."""
+    primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+    tenant = getattr(primary, 'tenant', None)
+    if tenant is None:
+        return
+    if (replica.schema_name != tenant.schema_name
+            or replica.include_public_schema != primary.include_public_schema):
+        replica.set_tenant(tenant, primary.include_public_schema)
+
+
+class ReplicaRouter:
+    """
+    Route safe reads to a replica and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _current_state.get()
+        if (state is None or not state.enabled or state.wrote
+                or not settings.REPLICA_DATABASES
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block
+                or _is_pinned(state)):
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            # Stick to one replica per request for consistent reads.
+            state.replica = random.choice(settings.REPLICA_DATABASES)
+        _sync_tenant(state.replica)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _current_state.get()
+        if state is not None:
+            state.wrote = True
+        # Explicitly, so instances read from a replica save to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+def start_routing(request):
+    """Begin routing reads for a request; returns (state, token)."""
+    state = RoutingState(request, enabled=request.method in SAFE_METHODS)
+    return state, _current_state.set(state)
+
+
+def finish_routing(state, token):
+    """
+    Stop routing for the current request, pinning its user to the primary
+    if the request wrote.
+    """
+    _current_state.reset(token)
+    if state.wrote and settings.REPLICA_DATABASES:
+        user = getattr(state.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(pin_key(user.pk), 1, settings.REPLICA_PIN_SECONDS)
+
+
+@contextmanager
+def use_replica():
+    """Read from a replica inside the block, e.g. in a Celery task."""
+    token = _current_state.set(RoutingState())
+    try:
+        yield
+    finally:
+        _current_state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block."""
+    token = _current_state.set(RoutingState(enabled=False))
+    try:
+        yield
+    finally:
+        _current_state.reset(token)
+
+
+def primary_db(view):
+    """Opt a view function or class out of replica reads."""
+    view.use_replica = False
+    return view
+
+
+def view_uses_replica(view_func):
+    """Return False if a resolved view opted out of replica reads."""
+    if getattr(view_func, 'use_replica', True) is False:
+        return False
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    return getattr(view_class, 'use_replica', True) is not False
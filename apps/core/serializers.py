@@ -0,0 +1,225 @@
+"""
+Serializers for core app.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SubRequestSerializer(serializers.Serializer):
+    """
+    A request within a batch.
+    """
+    id = serializers.CharField(max_length=100, required=False)
+    method = serializers.ChoiceField(
+        choices=['GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'], default='GET'
+    )
+    path = serializers.CharField(max_length=2000)
+    headers = serializers.DictField(child=serializers.CharField(max_length=1000), required=False)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def validate_path(self, value):
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError('Only API paths can be requested in a batch.')
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """
+    Batch request serializer.
+    """
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f'A batch can hold at most {settings.BATCH_MAX_REQUESTS} requests.'
+            )
+        return value
+
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_field_list(value):
+    """
+    Parse 'id,user.email,user.profile' into a tree of requested names:
+    {'id': {}, 'user': {'email': {}, 'profile': {}}}.
+    """
+    tree = {}
+    for item in value.split(','):
+        node = tree
+        for part in item.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets and on-demand expansion.
+
+    On GET requests, the top-level serializer reads the request's query:
+
+    - ?fields=id,name,user.email returns only the named fields. Fields that
+      are not returned are not built, so they are never computed.
+    - ?expand=user,user_count replaces the fields in Meta.expandable_fields
+      with their nested serializer, and adds the fields in
+      Meta.deferred_fields, which are left out by default. Other fields
+      are returned in full already; expanding them changes nothing.
+
+    Without either parameter the payload is the serializer's full one, so
+    only declare fields as expandable or deferred when adding them.
+    Nested serializers get their part of both (user.email), and also take
+    them as `fields` and `expand` arguments.
+
+    FieldSelectionMixin (apps.core.mixins) passes the same selection to the
+    view's queryset through optimize_queryset(). It loads only the columns
+    the returned fields read, joins the relations they follow, and adds the
+    annotations they use. Fields whose columns cannot be told from their
+    source (properties, method fields) list them in
+    Meta.field_dependencies; without that the queryset loads every column.
+
+        class Meta:
+            expandable_fields = {'user': ('apps.users.serializers.UserSerializer', {'read_only': True})}
+            deferred_fields = ('user_count',)
+            field_dependencies = {'full_name': ('first_name', 'last_name'), 'user_count': ()}
+            field_annotations = {'user_count': {'active_user_count': Count('user_roles')}}
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._field_selection = None if fields is None and expand is None else (fields, expand or {})
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_field_selection(self):
+        """Return (fields, expand): trees of requested names; fields is None for all."""
+        if self._field_selection is None:
+            fields, expand = None, {}
+            request = self.context.get('request')
+            if request is not None and request.method in SAFE_METHODS and self._is_top_level():
+                params = getattr(request, 'query_params', request.GET)
+                if params.get(FIELDS_PARAM):
+                    fields = parse_field_list(params[FIELDS_PARAM])
+                if params.get(EXPAND_PARAM):
+                    expand = parse_field_list(params[EXPAND_PARAM])
+            self._field_selection = (fields, expand)
+        return self._field_selection
+
+    def _meta_option(self, name, default):
+        return getattr(getattr(self, 'Meta', None), name, default)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, expand = self.get_field_selection()
+        expandable = self._meta_option('expandable_fields', {})
+        deferred = self._meta_option('deferred_fields', ())
+
+        for name in list(fields):
+            if selected is not None:
+                keep = name in selected
+            else:
+                keep = name not in deferred or name in expand
+            if not keep:
+                del fields[name]
+
+        for name, field in fields.items():
+            nested_fields = (selected.get(name) or None) if selected is not None else None
+            nested_expand = expand.get(name, {})
+            if name in expandable:
+                if name in expand or nested_fields:
+                    fields[name] = self._build_expanded_field(expandable[name], nested_fields, nested_expand)
+                continue
+            nested = getattr(field, 'child', field)
+            if isinstance(nested, DynamicFieldsMixin) and (nested_fields or nested_expand):
+                # Declared nested serializers take their part of the selection.
+                nested._field_selection = (nested_fields, nested_expand)
+        return fields
+
+    def _build_expanded_field(self, spec, nested_fields, nested_expand):
+        serializer_class, kwargs = spec if isinstance(spec, tuple) else (spec, {})
+        if isinstance(serializer_class, str):
+            serializer_class = import_string(serializer_class)
+        if issubclass(serializer_class, DynamicFieldsMixin):
+            kwargs = dict(kwargs, fields=nested_fields, expand=nested_expand)
+        return serializer_class(**kwargs)
+
+    def optimize_queryset(self, queryset):
+        """Adapt the queryset to the fields this serializer returns."""
+        plan = {'only': set(), 'select_related': set(), 'prefetch_related': set(), 'complete': True}
+        self._plan_fields(queryset.model, '', plan)
+        if plan['select_related']:
+            queryset = queryset.select_related(*sorted(plan['select_related']))
+        if plan['prefetch_related']:
+            queryset = queryset.prefetch_related(*sorted(plan['prefetch_related']))
+        annotations = {}
+        for name in self.fields:
+            annotations.update(self._meta_option('field_annotations', {}).get(name, {}))
+        annotations = {
+            alias: expression for alias, expression in annotations.items()
+            if alias not in queryset.query.annotations
+        }
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        if plan['complete']:
+            queryset = queryset.only(*sorted(plan['only']))
+        return queryset
+
+    def _plan_fields(self, model, prefix, plan):
+        plan['only'].add(prefix + model._meta.pk.name)
+        dependencies = self._meta_option('field_dependencies', {})
+        for name, field in self.fields.items():
+            if name in dependencies:
+                for path in dependencies[name]:
+                    _plan_path(model, prefix, path.split('__'), plan)
+            elif isinstance(field, DynamicFieldsMixin) and field.source != '*':
+                related = _plan_path(model, prefix, field.source.split('.'), plan, follow=True)
+                if related is None:
+                    plan['complete'] = False
+                else:
+                    field._plan_fields(related, prefix + field.source.replace('.', '__') + '__', plan)
+            elif isinstance(field, serializers.ManyRelatedField) and field.source != '*':
+                plan['prefetch_related'].add(prefix + field.source.replace('.', '__'))
+            elif field.source == '*' or isinstance(field, serializers.BaseSerializer):
+                plan['complete'] = False
+            else:
+                follow = not isinstance(field, serializers.PrimaryKeyRelatedField)
+                if _plan_path(model, prefix, field.source.split('.'), plan, follow=follow) is not None:
+                    # Not a column: a property, or a whole related object.
+                    plan['complete'] = False
+
+
+def _plan_path(model, prefix, parts, plan, follow=False):
+    """
+    Add the columns and joins an attribute path reads to plan. Returns the
+    model the path ends on when it is a followed relation, None for a
+    column, and False when the path is not made of model fields.
+    """
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        path = prefix + '__'.join(parts[:index + 1])
+        last = index == len(parts) - 1
+        if field.many_to_many or field.one_to_many:
+            plan['prefetch_related'].add(path)
+            return False
+        if field.is_relation and not field.concrete:
+            # Reverse one-to-one: joinable, but not a column of this model.
+            plan['select_related'].add(path)
+            if last and not follow:
+                return False
+        else:
+            plan['only'].add(path)
+            if not field.is_relation or (last and not follow):
+                return None
+            plan['select_related'].add(path)
+        model = field.related_model
+    return model
@@ -0,0 +1,32 @@
+"""
+Signal helpers for core app.
+"""
+from django.db import transaction
+
+
+def image_variants_handler(field_name, variants_field, kind):
+    """
+    Build a post_save receiver that keeps image variants in sync.
+
+    Variants record the source file they were rendered from, so comparing
+    names tells whether the upload changed without touching storage.
+    """
+    def handler(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        variants = getattr(instance, variants_field) or {}
+
+        if not field_file:
+            if variants:
+                sender.objects.filter(pk=instance.pk).update(**{variants_field: {}})
+                setattr(instance, variants_field, {})
+            return
+
+        if variants.get('source') == field_file.name:
+            return
+
+        from .tasks import process_image_variants
+        transaction.on_commit(lambda: process_image_variants.delay(
+            sender._meta.label, instance.pk, field_name, variants_field, kind
+        ))
+
+    return handler
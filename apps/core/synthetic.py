@@ -0,0 +1,332 @@
+"""
+High-volume synthetic data generation with PostgreSQL COPY.
+
+Rows are generated deterministically from a seed and the row number, and
+streamed into COPY ... FROM STDIN in chunks handled by a pool of worker
+processes, each with its own database connection. Ids are assigned up
+front from the current maximum of each table, so related rows can be
+generated independently in any worker; sequences are moved past them at
+the end.
+
+Synthetic tenants get a domain and settings but no schema. They exist to
+give the shared tables production-like volume, not to be browsed.
+"""
+import io
+import json
+import multiprocessing
+import random
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from apps.tenants.models import Domain, Tenant, TenantAuditLog, TenantSettings
+from apps.users.models import User, UserProfile, UserRole
+
+SYNTHETIC_PASSWORD = 'synthetic123'
+SYNTHETIC_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+USER_CHUNK_SIZE = 20000
+AUDIT_LOG_CHUNK_SIZE = 100000
+
+FIRST_NAMES = [
+    'Aarav', 'Amelia', 'Chen', 'Diego', 'Fatima', 'Hana', 'Isaac', 'Leila',
+    'Mateo', 'Nia', 'Olivia', 'Priya', 'Ravi', 'Sofia', 'Tariq', 'Yuki',
+]
+LAST_NAMES = [
+    'Ahmed', 'Brown', 'Garcia', 'Ivanova', 'Kim', 'Kowalski', 'Mensah',
+    'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Santos', 'Schmidt', 'Singh',
+]
+TIMEZONES = ['UTC', 'America/New_York', 'Europe/London', 'Asia/Kolkata', 'Asia/Tokyo']
+AUDIT_ACTIONS = [action for action, _ in TenantAuditLog.ACTION_CHOICES]
+AUDIT_RESOURCES = ['user_role', 'tenant', 'tenant_settings', 'invitation', 'domain']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/119.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6) AppleWebKit/605.1.15 Safari/605.1',
+    'EduCrowd/2.3 (Android 14)',
+    'EduCrowd/2.3 (iOS 17.1)',
+]
+
+SYNTHETIC_SCHEMA_PREFIX = 'synthetic_'
+SYNTHETIC_EMAIL_SUFFIX = '@synthetic.example.com'
+
+
+def parse_count(value):
+    """Parse counts such as '5000', '50k' or '50M'."""
+    value = str(value).strip().lower().replace('_', '')
+    multiplier = 1
+    if value and value[-1] in 'km':
+        multiplier = 1000 if value[-1] == 'k' else 1000000
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def _escape(value):
+    """Encode a value for COPY's text format."""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class CopyWriter:
+    """
+    Streams rows for one model into COPY FROM STDIN.
+
+    Fields missing from a row get the model field's default, or NULL.
+    """
+
+    def __init__(self, model):
+        self.fields = model._meta.concrete_fields
+        self.table = model._meta.db_table
+        self.defaults = {}
+        for field in self.fields:
+            if field.has_default():
+                self.defaults[field.attname] = field.get_default()
+            elif not field.null and field.get_internal_type() in ('CharField', 'TextField', 'EmailField', 'URLField'):
+                self.defaults[field.attname] = ''
+            else:
+                self.defaults[field.attname] = None
+
+    def copy(self, rows, cursor):
+        """COPY the rows into the table using cursor; returns the row count."""
+        buffer = io.StringIO()
+        count = 0
+        for row in rows:
+            buffer.write('\t'.join(
+                _escape(row.get(field.attname, self.defaults[field.attname]))
+                for field in self.fields
+            ))
+            buffer.write('\n')
+            count += 1
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in self.fields)
+        cursor.copy_expert(f'COPY {self.table} ({columns}) FROM STDIN', buffer)
+        return count
+
+
+def _rng(seed, kind, start):
+    """Return the deterministic random generator for a chunk."""
+    return random.Random(f'{seed}:{kind}:{start}')
+
+
+def _generate_users(plan, start, end):
+    """Return users, profiles and roles for user numbers start..end-1."""
+    rng = _rng(plan['seed'], 'users', start)
+    users, profiles, roles = [], [], []
+    for number in range(start, end):
+        user_id = plan['user_base'] + number
+        tenant_index = number // plan['users_per_tenant']
+        joined = SYNTHETIC_EPOCH + timedelta(minutes=number)
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        users.append({
+            'id': user_id,
+            'password': plan['password'],
+            'is_superuser': False,
+            'username': f'synthetic{user_id}',
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': f'synthetic{user_id}{SYNTHETIC_EMAIL_SUFFIX}',
+            'is_staff': False,
+            'is_active': True,
+            'date_joined': joined,
+            'is_verified': rng.random() < 0.8,
+            'created_at': joined,
+            'updated_at': joined,
+        })
+        profiles.append({
+            'id': plan['profile_base'] + number,
+            'user_id': user_id,
+            'timezone': rng.choice(TIMEZONES),
+            'created_at': joined,
+            'updated_at': joined,
+        })
+        if number % plan['users_per_tenant'] == 0:
+            role = 'admin'
+        else:
+            role = 'teacher' if rng.random() < 0.1 else 'student'
+        roles.append({
+            'id': plan['role_base'] + number,
+            'user_id': user_id,
+            'tenant_id': plan['tenant_base'] + tenant_index,
+            'role': role,
+            'is_active': rng.random() < 0.95,
+            'assigned_at': joined,
+        })
+    return users, profiles, roles
+
+
+def _generate_audit_logs(plan, start, end):
+    """Yield audit log rows for numbers start..end-1."""
+    rng = _rng(plan['seed'], 'audit_logs', start)
+    span = plan['audit_log_span_minutes']
+    for number in range(start, end):
+        tenant_index = rng.randrange(plan['tenants'])
+        user_number = tenant_index * plan['users_per_tenant'] + rng.randrange(plan['users_per_tenant'])
+        yield {
+            'id': plan['audit_log_base'] + number,
+            'tenant_id': plan['tenant_base'] + tenant_index,
+            'user_id': plan['user_base'] + user_number,
+            'action': rng.choice(AUDIT_ACTIONS),
+            'resource_type': rng.choice(AUDIT_RESOURCES),
+            'resource_id': str(rng.randrange(1, 100000)),
+            'description': 'Synthetic audit event',
+            'ip_address': f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+            'user_agent': rng.choice(USER_AGENTS),
+            'created_at': SYNTHETIC_EPOCH + timedelta(minutes=span * number // max(1, plan['audit_logs'])),
+        }
+
+
+def _load_chunk(task):
+    """Worker entry point: generate one chunk and COPY it in a transaction."""
+    kind, plan, start, end = task
+    with transaction.atomic(), connection.cursor() as cursor:
+        if kind == 'users':
+            users, profiles, roles = _generate_users(plan, start, end)
+            CopyWriter(User).copy(users, cursor)
+            CopyWriter(UserProfile).copy(profiles, cursor)
+            CopyWriter(UserRole).copy(roles, cursor)
+        else:
+            CopyWriter(TenantAuditLog).copy(_generate_audit_logs(plan, start, end), cursor)
+    connection.close()
+    return kind, end - start
+
+
+def _next_id(model):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {model._meta.db_table}')
+        return cursor.fetchone()[0]
+
+
+def _reset_sequences(models):
+    with connection.cursor() as cursor:
+        for model in models:
+            table = model._meta.db_table
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            )
+            cursor.execute(f'ANALYZE {table}')
+
+
+def _load_tenants(plan):
+    """Create the synthetic tenants with their domains and settings."""
+    tenants, domains, settings_rows = [], [], []
+    for index in range(plan['tenants']):
+        tenant_id = plan['tenant_base'] + index
+        created = SYNTHETIC_EPOCH + timedelta(hours=index)
+        tenants.append({
+            'id': tenant_id,
+            'schema_name': f'{SYNTHETIC_SCHEMA_PREFIX}{tenant_id}',
+            'name': f'Synthetic Tenant {tenant_id}',
+            'description': 'Synthetic tenant for performance testing',
+            'email': f'contact{tenant_id}{SYNTHETIC_EMAIL_SUFFIX}',
+            'created_at': created,
+            'updated_at': created,
+        })
+        domains.append({
+            'id': plan['domain_base'] + index,
+            'domain': f'synthetic-{tenant_id}.localhost',
+            'tenant_id': tenant_id,
+            'is_primary': True,
+            'created_at': created,
+        })
+        settings_rows.append({
+            'id': plan['settings_base'] + index,
+            'tenant_id': tenant_id,
+            'created_at': created,
+            'updated_at': created,
+        })
+    with transaction.atomic(), connection.cursor() as cursor:
+        CopyWriter(Tenant).copy(tenants, cursor)
+        CopyWriter(Domain).copy(domains, cursor)
+        CopyWriter(TenantSettings).copy(settings_rows, cursor)
+
+
+def generate(tenants, users_per_tenant, audit_logs, seed=1, workers=None, log=print):
+    """
+    Load tenants, users (with profiles and roles) and audit logs.
+
+    Returns a dict with the number of rows loaded per kind.
+    """
+    plan = {
+        'seed': seed,
+        'tenants': tenants,
+        'users_per_tenant': users_per_tenant,
+        'audit_logs': audit_logs,
+        'audit_log_span_minutes': 365 * 24 * 60,
+        # Every synthetic user shares one hash; hashing millions of
+        # passwords would dominate the run.
+        'password': make_password(SYNTHETIC_PASSWORD),
+        'tenant_base': _next_id(Tenant),
+        'domain_base': _next_id(Domain),
+        'settings_base': _next_id(TenantSettings),
+        'user_base': _next_id(User),
+        'profile_base': _next_id(UserProfile),
+        'role_base': _next_id(UserRole),
+        'audit_log_base': _next_id(TenantAuditLog),
+    }
+
+    log(f'Loading {tenants} tenants...')
+    _load_tenants(plan)
+
+    total_users = tenants * users_per_tenant
+    tasks = [
+        ('users', plan, start, min(start + USER_CHUNK_SIZE, total_users))
+        for start in range(0, total_users, USER_CHUNK_SIZE)
+    ]
+    if total_users:
+        tasks += [
+            ('audit_logs', plan, start, min(start + AUDIT_LOG_CHUNK_SIZE, audit_logs))
+            for start in range(0, audit_logs, AUDIT_LOG_CHUNK_SIZE)
+        ]
+
+    # Children must not share the parent's database socket.
+    connections.close_all()
+    loaded = {'tenants': tenants, 'users': 0, 'audit_logs': 0}
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes=workers) as pool:
+        # Audit logs reference users, so all user chunks go in first.
+        user_tasks = [task for task in tasks if task[0] == 'users']
+        log_tasks = [task for task in tasks if task[0] == 'audit_logs']
+        for batch in (user_tasks, log_tasks):
+            for kind, count in pool.imap_unordered(_load_chunk, batch):
+                loaded[kind] += count
+                log(f"  {kind}: {loaded[kind]:,} rows")
+
+    _reset_sequences([
+        Tenant, Domain, TenantSettings, User, UserProfile, UserRole, TenantAuditLog
+    ])
+    return loaded
+
+
+def clear():
+    """Delete all synthetic rows, children first."""
+    tenant_ids = f'SELECT id FROM {Tenant._meta.db_table} WHERE schema_name LIKE %s'
+    user_ids = f'SELECT id FROM {User._meta.db_table} WHERE email LIKE %s'
+    tenant_pattern = [SYNTHETIC_SCHEMA_PREFIX.replace('_', '\\_') + '%']
+    user_pattern = ['%' + SYNTHETIC_EMAIL_SUFFIX]
+    statements = [
+        (TenantAuditLog, 'tenant_id', tenant_ids, tenant_pattern),
+        (UserRole, 'tenant_id', tenant_ids, tenant_pattern),
+        (UserProfile, 'user_id', user_ids, user_pattern),
+        (TenantSettings, 'tenant_id', tenant_ids, tenant_pattern),
+        (Domain, 'tenant_id', tenant_ids, tenant_pattern),
+        (User, 'id', user_ids, user_pattern),
+        (Tenant, 'id', tenant_ids, tenant_pattern),
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model, column, subquery, params in statements:
+            cursor.execute(
+                f'DELETE FROM {model._meta.db_table} WHERE {column} IN ({subquery})',
+                params
+            )
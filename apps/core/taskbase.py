@@ -0,0 +1,248 @@
+"""
+Base classes for Celery tasks.
+
+TenantTask is the default task class of the Celery app (see
+educrowd/celery.py), so every @shared_task gets its behaviour:
+
+- The tenant schema active when the task is sent travels with it in a
+  message header, and the task runs in that schema.
+- It is routed by its priority_queue ('high', 'default' or 'low'). Tasks
+  with tenant_fair set go to one of CELERY_TENANT_QUEUE_SHARDS queues of
+  their priority, picked by tenant, so a tenant sending thousands of jobs
+  only fills its own shard. Workers consume their queues round robin.
+  The high queue isn't sharded: tenant_fair is ignored for it, so its
+  tasks stay on the queue the dedicated high workers consume.
+- With a task_key, sending is idempotent: a task whose key is already
+  queued or done within idempotency_timeout is not sent again, and is
+  skipped if delivered twice.
+- Published, finished and failed tasks, run time and time spent waiting
+  in the queue are counted per queue in Prometheus, and each run is
+  traced (see apps.core.tracing).
+
+    @shared_task(priority_queue='low', tenant_fair=True,
+                 task_key=lambda export_id: export_id)
+    def export_user_data(export_id):
+        ...
+
+batched_task() turns a function taking a list into a task collecting
+items per tenant and running once per `size` items or `interval` seconds.
+"""
+import json
+import logging
+import math
+import time
+import zlib
+from celery import Task, shared_task
+from celery.exceptions import Ignore, Retry
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from django_tenants.utils import schema_context
+from kombu.utils.uuid import uuid
+from .caching import current_schema
+from .logs import reset_log_context, set_log_context
+from .metrics import observe_task, record_task_published
+from .tracing import current_trace, finish_trace, start_trace
+
+logger = logging.getLogger('educrowd')
+
+SCHEMA_HEADER = 'tenant_schema'
+ENQUEUED_AT_HEADER = 'enqueued_at'
+TASK_KEY_HEADER = 'task_key'
+
+PRIORITY_QUEUES = ('high', 'default', 'low')
+
+# Priorities whose tenant-fair tasks are spread over shard queues.
+SHARDED_QUEUES = ('default', 'low')
+
+
+def queue_for(priority, schema=None, tenant_fair=False):
+    """Return the queue a task of the given priority and tenant goes to."""
+    if priority not in PRIORITY_QUEUES:
+        raise ValueError(f'Unknown priority queue {priority!r}')
+    if not tenant_fair or not schema or priority not in SHARDED_QUEUES:
+        return priority
+    shard = zlib.crc32(schema.encode()) % settings.CELERY_TENANT_QUEUE_SHARDS
+    return f'{priority}.{shard}'
+
+
+class TenantTask(Task):
+    """
+    Task running in the tenant schema it was sent from.
+    """
+    priority_queue = 'default'
+    tenant_fair = False
+
+    # Callable receiving the task's arguments and returning the key that
+    # identifies the work; None makes the task not idempotent.
+    task_key = None
+    idempotency_timeout = 24 * 60 * 60
+
+    def _key_cache_key(self, state, schema, key):
+        return f'task:{state}:{self.name}:{schema}:{key}'
+
+    def _header(self, name):
+        value = self.request.get(name)
+        if value is None:
+            value = (self.request.headers or {}).get(name)
+        return value
+
+    def apply_async(self, args=None, kwargs=None, task_id=None, **options):
+        schema = current_schema()
+        headers = options.setdefault('headers', {})
+        headers.setdefault(SCHEMA_HEADER, schema)
+        headers[ENQUEUED_AT_HEADER] = time.time()
+        if 'queue' not in options and not getattr(self, 'queue', None):
+            options['queue'] = queue_for(self.priority_queue, headers[SCHEMA_HEADER], self.tenant_fair)
+
+        task_id = task_id or uuid()
+        queued_key = None
+        key = options.pop('task_key', None)
+        if key is None and self.task_key is not None:
+            key = type(self).task_key(*(args or ()), **(kwargs or {}))
+        if key is not None:
+            key = str(key)
+            headers[TASK_KEY_HEADER] = key
+        if key is not None and not options.get('retries'):
+            # Retries are sent while the key is still queued.
+            schema = headers[SCHEMA_HEADER]
+            done = cache.get(self._key_cache_key('done', schema, key))
+            if done is not None:
+                return self.AsyncResult(done)
+            queued_key = self._key_cache_key('queued', schema, key)
+            if not cache.add(queued_key, task_id, self.idempotency_timeout):
+                return self.AsyncResult(cache.get(queued_key) or task_id)
+
+        record_task_published(options.get('queue') or getattr(self, 'queue', None) or 'default', self.name)
+        try:
+            return super().apply_async(args, kwargs, task_id=task_id, **options)
+        except Exception:
+            # Nothing was queued; don't make the next attempt look like a duplicate.
+            if queued_key is not None:
+                cache.delete(queued_key)
+            raise
+
+    def __call__(self, *args, **kwargs):
+        schema = self._header(SCHEMA_HEADER)
+        if schema is None:
+            # Called directly rather than by a worker.
+            return super().__call__(*args, **kwargs)
+
+        delivery_info = self.request.delivery_info or {}
+        queue = delivery_info.get('routing_key') or queue_for(self.priority_queue, schema, self.tenant_fair)
+        enqueued_at = self._header(ENQUEUED_AT_HEADER)
+        wait = max(time.time() - float(enqueued_at), 0.0) if enqueued_at else None
+        key = self._header(TASK_KEY_HEADER)
+
+        started = time.perf_counter()
+        state = 'success'
+        log_token = set_log_context(request_id=self.request.id, tenant=schema)
+        trace, trace_token = (None, None) if current_trace() else start_trace(
+            self.request.id, self.name, kind='task', queue=queue, tenant=schema)
+        try:
+            with schema_context(schema):
+                if key is not None and cache.get(self._key_cache_key('done', schema, key)) is not None:
+                    state = 'skipped'
+                    return None
+                result = super().__call__(*args, **kwargs)
+        except Retry:
+            state = 'retry'
+            raise
+        except Ignore:
+            state = 'ignored'
+            raise
+        except Exception:
+            state = 'failure'
+            if key is not None:
+                # Let the work be sent again.
+                cache.delete(self._key_cache_key('queued', schema, key))
+            raise
+        else:
+            if key is not None:
+                cache.set(self._key_cache_key('done', schema, key), self.request.id, self.idempotency_timeout)
+                cache.delete(self._key_cache_key('queued', schema, key))
+            return result
+        finally:
+            if trace is not None:
+                trace.attrs['state'] = state
+            finish_trace(trace, trace_token)
+            reset_log_context(log_token)
+            observe_task(queue, self.name, state, time.perf_counter() - started, wait)
+
+
+class BatchTask(TenantTask):
+    """
+    Task running a function on the items collected for a tenant.
+
+    add() appends an item to a Redis list per task and tenant. The first
+    item schedules a run batch_interval seconds later, and every
+    batch_size-th item one right away. A run takes up to batch_size items
+    and, if more are left, schedules the next run.
+    """
+    priority_queue = 'low'
+    tenant_fair = True
+    batch_size = 100
+    batch_interval = 5.0
+    max_retries = 3
+
+    def _batch_key(self, schema):
+        return f'batch:{self.name}:{schema}'
+
+    def _schedule(self, client, key, length):
+        scheduled = client.set(f'{key}:scheduled', 1, nx=True, ex=math.ceil(self.batch_interval) + 60)
+        if length and length % self.batch_size == 0:
+            self.apply_async()
+        elif scheduled:
+            self.apply_async(countdown=self.batch_interval)
+
+    def add(self, item):
+        """Queue an item (anything JSON serializable) for the next batch."""
+        key = self._batch_key(current_schema())
+        client = get_redis_connection('default')
+        length = client.rpush(key, json.dumps(item))
+        self._schedule(client, key, length)
+
+    def run_batch(self, func, items=None):
+        client = get_redis_connection('default')
+        key = self._batch_key(current_schema())
+        if items is None:
+            client.delete(f'{key}:scheduled')
+            items = [json.loads(raw) for raw in client.lpop(key, self.batch_size) or []]
+        if items:
+            try:
+                func(items)
+            except Exception as exc:
+                logger.warning('Batch of %d items for %s failed', len(items), self.name, exc_info=True)
+                raise self.retry(kwargs={'items': items}, exc=exc)
+        remaining = client.llen(key)
+        if remaining and client.set(f'{key}:scheduled', 1, nx=True, ex=math.ceil(self.batch_interval) + 60):
+            self.apply_async(countdown=0 if remaining >= self.batch_size else self.batch_interval)
+        return len(items)
+
+
+def batched_task(size=100, interval=5.0, **options):
+    """
+    Decorate a function taking a list of items into a BatchTask.
+
+        @batched_task(size=500, interval=10)
+        def record_views(items):
+            ...
+
+        record_views.add({'course': 1, 'user': 2})
+
+    A failed batch is retried with the same items up to max_retries times.
+    """
+    def decorator(func):
+        def run(self, items=None):
+            return self.run_batch(func, items)
+        run.__doc__ = func.__doc__
+        return shared_task(
+            bind=True,
+            base=BatchTask,
+            name=f'{func.__module__}.{func.__name__}',
+            batch_size=size,
+            batch_interval=interval,
+            ignore_result=True,
+            **options
+        )(run)
+    return decorator
@@ -0,0 +1,34 @@
+"""
+Celery tasks for core app.
+"""
+from celery import shared_task
+from django.apps import apps
+from django.utils import timezone
+from .images import generate_image_variants
+
+
+@shared_task(ignore_result=True, priority_queue='low', tenant_fair=True)
+def process_image_variants(model_label, pk, field_name, variants_field, kind):
+    """
+    Generate resized, metadata-free variants for an image field.
+
+    The variants are only written back if the field still holds the file
+    they were rendered from, so a newer upload is never overwritten by a
+    slower task for an older one.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only(field_name).first()
+    if instance is None:
+        return
+
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return
+
+    variants = generate_image_variants(field_file, kind)
+    if variants is None:
+        return
+
+    model.objects.filter(pk=pk, **{field_name: field_file.name}).update(
+        **{variants_field: variants, 'updated_at': timezone.now()}
+    )
@@ -0,0 +1,75 @@
+"""
+Tests for core app.
+"""
+from unittest import mock
+from celery import Task
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from educrowd.celery import app
+from .mixins import ConditionalRequestMixin
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@app.task(name='apps.core.tests.keyed_task', task_key=lambda item_id: item_id)
+def keyed_task(item_id):
+    return item_id
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TenantTaskIdempotencyTests(SimpleTestCase):
+    """
+    Sending a task with a task_key.
+    """
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('apps.core.taskbase.current_schema', return_value='public')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_publish_does_not_block_the_next_attempt(self):
+        with mock.patch.object(Task, 'apply_async', side_effect=ConnectionError('broker down')):
+            with self.assertRaises(ConnectionError):
+                keyed_task.delay(7)
+        self.assertIsNone(cache.get(keyed_task._key_cache_key('queued', 'public', '7')))
+
+        with mock.patch.object(Task, 'apply_async', return_value='sent') as publish:
+            self.assertEqual(keyed_task.delay(7), 'sent')
+        publish.assert_called_once()
+
+    def test_duplicate_is_not_published(self):
+        with mock.patch.object(Task, 'apply_async', return_value='sent') as publish:
+            keyed_task.delay(8)
+            keyed_task.delay(8)
+        publish.assert_called_once()
+
+
+class ConditionalRequestETagTests(SimpleTestCase):
+    """
+    ETags of views using ConditionalRequestMixin.
+    """
+
+    def get_etag(self, query='', method='get'):
+        queryset = mock.Mock()
+        queryset.model._meta.label = 'users.User'
+        queryset.values_list.return_value.first.return_value = (1, None)
+        view = ConditionalRequestMixin()
+        view.request = Request(getattr(APIRequestFactory(), method)(f'/api/v1/auth/users/1/{query}'))
+        view.get_condition_queryset = lambda: queryset
+        return view.get_condition()[0]
+
+    def test_field_selection_changes_the_etag(self):
+        full = self.get_etag()
+        self.assertNotEqual(self.get_etag('?fields=id,email'), full)
+        self.assertNotEqual(self.get_etag('?expand=profile'), full)
+        self.assertNotEqual(self.get_etag('?fields=id'), self.get_etag('?fields=id,email'))
+
+    def test_field_selection_is_normalized(self):
+        self.assertEqual(self.get_etag('?fields=email,id'), self.get_etag('?fields=id,%20email,id'))
+        self.assertEqual(self.get_etag('?fields='), self.get_etag())
+
+    def test_updates_compare_with_the_full_representation(self):
+        self.assertEqual(self.get_etag('?fields=id', method='patch'), self.get_etag())
@@ -0,0 +1,284 @@
+"""
+Lightweight in-process tracing.
+
+TracingMiddleware starts a trace per request (and TenantTask one per
+Celery task). While a trace is active, span() records where the time
+goes; install_tracing() adds spans around tenant resolution, DRF
+authentication, permissions and throttling, views, serializers, ORM
+queries, cache calls and outgoing mail:
+
+    with span('stats.compute', 'internal', tenant=schema):
+        ...
+
+Finished traces are kept in a ring buffer of TRACE_BUFFER_SIZE per process. Traces slower than
+TRACE_SLOW_MS are also kept in a second buffer, shown by the traces debug
+endpoint, and a TRACE_EXPORT_RATE fraction of them is written as JSON
+lines to the educrowd.traces logger (logs/traces.jsonl).
+"""
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+trace_logger = logging.getLogger('educrowd.traces')
+
+_current_trace = ContextVar('educrowd_trace', default=None)
+_current_span = ContextVar('educrowd_span', default=None)
+
+_buffers = None
+_buffers_lock = threading.Lock()
+
+
+class Span:
+    """
+    A timed operation within a trace.
+    """
+    __slots__ = ('name', 'kind', 'start', 'duration', 'parent', 'attrs')
+
+    def __init__(self, name, kind, start, parent, attrs):
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.duration = None
+        self.parent = parent
+        self.attrs = attrs
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'start_ms': round(self.start * 1000, 3),
+            'duration_ms': round((self.duration or 0) * 1000, 3),
+            'parent': self.parent,
+            'attrs': self.attrs,
+        }
+
+
+class Trace:
+    """
+    The spans recorded while handling one request or task.
+    """
+    __slots__ = ('trace_id', 'name', 'kind', 'started_at', 'start', 'duration',
+                 'spans', 'dropped_spans', 'attrs', 'lock')
+
+    def __init__(self, trace_id, name, kind, attrs):
+        self.trace_id = trace_id
+        self.name = name
+        self.kind = kind
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.dropped_spans = 0
+        self.attrs = attrs
+        # Batch sub-requests add spans from several threads.
+        self.lock = threading.Lock()
+
+    def summary(self):
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'kind': self.kind,
+            'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            'duration_ms': round((self.duration or 0) * 1000, 3),
+            'spans': len(self.spans),
+            'attrs': self.attrs,
+        }
+
+    def breakdown(self):
+        """Return the total ms per span kind, counting nested spans once."""
+        totals = {}
+        for record in self.spans:
+            if record.parent is None or self.spans[record.parent].kind != record.kind:
+                totals[record.kind] = totals.get(record.kind, 0) + (record.duration or 0) * 1000
+        return {kind: round(ms, 3) for kind, ms in sorted(totals.items(), key=lambda item: -item[1])}
+
+    def to_dict(self):
+        data = self.summary()
+        data['breakdown_ms'] = self.breakdown()
+        data['dropped_spans'] = self.dropped_spans
+        data['spans'] = [record.to_dict() for record in self.spans]
+        return data
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def start_trace(trace_id, name, kind='request', **attrs):
+    """Start a trace in the current context; returns (trace, token), or (None, None) if not sampled."""
+    if not settings.TRACING_ENABLED or random.random() >= settings.TRACE_SAMPLE_RATE:
+        return None, None
+    trace = Trace(trace_id, name, kind, attrs)
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(trace, token):
+    """End a trace and hand it to the buffers and the slow trace export."""
+    if trace is None:
+        return
+    _current_trace.reset(token)
+    trace.duration = time.perf_counter() - trace.start
+    _add_middleware_spans(trace)
+    slow = trace.duration * 1000 >= settings.TRACE_SLOW_MS
+    with _buffers_lock:
+        recent, slow_traces = _get_buffers()
+        recent.append(trace)
+        if slow:
+            slow_traces.append(trace)
+    if slow and random.random() < settings.TRACE_EXPORT_RATE:
+        trace_logger.info(json.dumps(trace.to_dict(), separators=(',', ':'), default=str))
+
+
+def _get_buffers():
+    global _buffers
+    if _buffers is None:
+        _buffers = (deque(maxlen=settings.TRACE_BUFFER_SIZE), deque(maxlen=settings.TRACE_SLOW_BUFFER_SIZE))
+    return _buffers
+
+
+def _add_middleware_spans(trace):
+    """
+    Attribute the time before and after the view to middleware.
+
+    The two spans become the parents of the top-level spans recorded
+    before and after the view (such as tenant.resolve), so that time is
+    not counted twice in the breakdown.
+    """
+    view = next((record for record in trace.spans if record.kind == 'view' and record.parent is None), None)
+    if view is None or view.duration is None:
+        return
+    before = Span('middleware.request', 'middleware', 0.0, None, {})
+    before.duration = view.start
+    after = Span('middleware.response', 'middleware', view.start + view.duration, None, {})
+    after.duration = max(trace.duration - after.start, 0.0)
+    with trace.lock:
+        before_index = len(trace.spans)
+        for record in trace.spans:
+            if record.parent is None and record is not view:
+                record.parent = before_index if record.start < view.start else before_index + 1
+        trace.spans.extend((before, after))
+
+
+@contextmanager
+def span(name, kind='internal', **attrs):
+    """Record a span in the current trace, if there is one."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    record = Span(name, kind, time.perf_counter() - trace.start, _current_span.get(), attrs)
+    with trace.lock:
+        if len(trace.spans) >= settings.TRACE_MAX_SPANS:
+            trace.dropped_spans += 1
+            record = None
+        else:
+            trace.spans.append(record)
+            index = len(trace.spans) - 1
+    if record is None:
+        yield None
+        return
+    token = _current_span.set(index)
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.duration = time.perf_counter() - started
+        _current_span.reset(token)
+
+
+def _in_span_of_kind(kind):
+    trace = _current_trace.get()
+    index = _current_span.get()
+    return index is not None and trace is not None and trace.spans[index].kind == kind
+
+
+def traced(name, kind, outermost=False, attrs=None):
+    """
+    Decorate a function so calls are recorded as spans.
+
+    With outermost, calls made within a span of the same kind (nested
+    serializers, a cache method calling another) are not recorded again.
+    attrs is a callable receiving the call's arguments and returning span
+    attributes.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None or (outermost and _in_span_of_kind(kind)):
+                return func(*args, **kwargs)
+            with span(name, kind, **(attrs(*args, **kwargs) if attrs else {})):
+                return func(*args, **kwargs)
+        wrapper.__traced__ = True
+        return wrapper
+    return decorator
+
+
+def trace_query(execute, sql, params, many, context):
+    """Database execute wrapper recording queries of the current trace."""
+    if _current_trace.get() is None:
+        return execute(sql, params, many, context)
+    with span('db.query', 'db', sql=sql[:200], alias=context['connection'].alias, many=many):
+        return execute(sql, params, many, context)
+
+
+def install_query_tracer(sender, connection, **kwargs):
+    """connection_created receiver installing trace_query on the connection."""
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, trace_query)
+
+
+def _patch(cls, method, name, kind, outermost=False, attrs=None):
+    func = getattr(cls, method)
+    if not getattr(func, '__traced__', False):
+        setattr(cls, method, traced(name, kind, outermost, attrs)(func))
+
+
+CACHE_METHODS = ('get', 'get_many', 'has_key', 'set', 'add', 'set_many',
+                 'delete', 'delete_many', 'incr', 'decr')
+
+
+def install_tracing():
+    """Add spans to DRF, serializers, the configured caches and mail."""
+    from django.core.mail import EmailMessage
+    from rest_framework import serializers
+    from rest_framework.views import APIView
+
+    _patch(APIView, 'dispatch', 'view', 'view', outermost=True,
+           attrs=lambda view, request, *args, **kwargs: {'view': type(view).__name__})
+    _patch(APIView, 'perform_authentication', 'drf.authentication', 'auth')
+    _patch(APIView, 'check_permissions', 'drf.permissions', 'auth')
+    _patch(APIView, 'check_object_permissions', 'drf.object_permissions', 'auth')
+    _patch(APIView, 'check_throttles', 'drf.throttles', 'auth')
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        _patch(cls, 'to_representation', 'serializer.to_representation', 'serializer', outermost=True,
+               attrs=lambda serializer, instance: {'serializer': type(serializer).__name__})
+    for alias in settings.CACHES:
+        cache_class = import_string(settings.CACHES[alias]['BACKEND'])
+        for method in CACHE_METHODS:
+            _patch(cache_class, method, f'cache.{method}', 'cache', outermost=True)
+    _patch(EmailMessage, 'send', 'mail.send', 'mail',
+           attrs=lambda message, *args, **kwargs: {'recipients': len(message.recipients())})
+
+
+def get_traces(slow=True, limit=20):
+    """Return the most recent (slow) traces of this process, newest first."""
+    with _buffers_lock:
+        recent, slow_traces = _get_buffers()
+        traces = list(slow_traces if slow else recent)
+    return traces[::-1][:limit]
+
+
+def find_trace(trace_id):
+    with _buffers_lock:
+        recent, slow_traces = _get_buffers()
+        traces = list(recent) + list(slow_traces)
+    return next((trace for trace in traces if trace.trace_id == trace_id), None)
@@ -1,10 +1,18 @@
 """
 URL configuration for core app.
 """
+import secrets
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.urls import path
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework import permissions
+from rest_framework import permissions, status
+from .health import aget_health_report
+from .warmup import get_warmup_report
+from .metrics import render_metrics
+from .tracing import find_trace, get_traces
+from .views import AsyncAPIView, BatchView
 
 
 @api_view(['GET'])
@@ -39,7 +47,96 @@ def health_check(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def readiness_check(request):
+    """
+    Readiness endpoint; 503 until this worker has finished warming up.
+    """
+    report = get_warmup_report()
+    return Response(
+        {
+            'status': 'ready' if report['ready'] else 'warming_up',
+            'timestamp': report['timestamp'],
+            'steps': report['steps'],
+        },
+        status=status.HTTP_200_OK if report['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+class DeepHealthCheckView(AsyncAPIView):
+    """
+    Deep health check probing the database, cache, broker and workers.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    async def get(self, request):
+        report = await aget_health_report()
+        return Response(
+            {
+                'status': report['status'],
+                'message': 'EduCrowd API dependency check',
+                'version': '1.0.0',
+                'timestamp': report['timestamp'],
+                'checks': report['checks'],
+            },
+            status=status.HTTP_503_SERVICE_UNAVAILABLE if report['status'] == 'unhealthy' else status.HTTP_200_OK
+        )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def recent_traces(request):
+    """
+    Recent slow traces of the worker process serving the request.
+
+    ?all=1 lists every recent trace instead, ?limit=N caps the list and
+    ?trace_id=ID returns a single trace with its spans.
+    """
+    trace_id = request.query_params.get('trace_id')
+    if trace_id:
+        trace = find_trace(trace_id)
+        if trace is None:
+            return Response({'error': 'Trace not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(trace.to_dict())
+
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 200)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    slow_only = request.query_params.get('all') not in ('1', 'true')
+    return Response({
+        'slow_ms': settings.TRACE_SLOW_MS,
+        'traces': [
+            dict(trace.summary(), breakdown_ms=trace.breakdown())
+            for trace in get_traces(slow=slow_only, limit=limit)
+        ],
+    })
+
+
+def metrics(request):
+    """
+    Prometheus metrics endpoint.
+    """
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if token:
+        allowed = secrets.compare_digest(authorization, f'Bearer {token}')
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
 urlpatterns = [
     path('', core_home, name='core-home'),
     path('health/', health_check, name='health-check'),
+    path('health/deep/', DeepHealthCheckView.as_view(), name='deep-health-check'),
+    path('health/ready/', readiness_check, name='readiness-check'),
+    path('metrics/', metrics, name='metrics'),
+    path('traces/', recent_traces, name='recent-traces'),
+    path('batch/', BatchView.as_view(), name='batch'),
 ]
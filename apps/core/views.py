@@ -0,0 +1,74 @@
+"""
+Base views for core app.
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .batch import run_batch
+from .serializers import BatchRequestSerializer
+from .tracing import span
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines.
+
+    Meant for endpoints that spend their time waiting on the network (mail,
+    dependency probes, outgoing webhooks). Under ASGI the request holds no
+    thread while it waits; under WSGI Django runs the view in an event loop
+    of the worker thread and it behaves like a regular view.
+
+    Authentication, permissions and throttling run as usual, in Django's
+    sync thread for the request, since they may query the database.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        with span('view', 'view', view=type(self).__name__):
+            return await self._dispatch(request, *args, **kwargs)
+
+    async def _dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(),
+                                  self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class BatchView(APIView):
+    """
+    Run several API requests in one round trip.
+
+    See apps.core.batch. The response lists the status, selected headers
+    and body of each sub-request, in the order they were sent.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    batch_allowed = False
+
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            {'responses': run_batch(request, serializer.validated_data['requests'])},
+            status=status.HTTP_200_OK
+        )
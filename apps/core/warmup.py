@@ -0,0 +1,95 @@
+"""
+Per-process warm-up.
+
+gunicorn.conf.py runs warm_up() in every worker right after it loads the
+application and before it accepts connections, so the first requests after
+a deploy don't pay for connecting to the database and Redis, building the
+URL resolver or filling the tenant lookup cache. Elsewhere (runserver,
+Celery) it runs on the first readiness check.
+"""
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.urls import get_resolver
+from django.utils import timezone
+
+logger = logging.getLogger('educrowd')
+
+_report = None
+_lock = threading.Lock()
+
+
+def warm_database():
+    """Open a connection to every configured database."""
+    for conn in connections.all():
+        conn.ensure_connection()
+
+
+def warm_cache():
+    """Connect to Redis (and start the cache's invalidation listener)."""
+    cache.get('warmup:probe')
+
+
+def warm_urls():
+    """Import every view and build the resolver's reverse lookup tables."""
+    for urlconf in {settings.ROOT_URLCONF, getattr(settings, 'PUBLIC_SCHEMA_URLCONF', settings.ROOT_URLCONF)}:
+        get_resolver(urlconf).reverse_dict
+
+
+def warm_tenants():
+    """Load the hostname -> tenant lookups into the cache."""
+    from apps.tenants.middleware import prime_domain_cache
+    return {'domains': prime_domain_cache(settings.WARMUP_DOMAINS)}
+
+
+# name -> (step, critical). The worker only reports ready once every
+# critical step succeeded; the others just leave a cache cold.
+STEPS = {
+    'database': (warm_database, True),
+    'cache': (warm_cache, True),
+    'urls': (warm_urls, True),
+    'tenants': (warm_tenants, False),
+}
+
+
+def warm_up():
+    """Run every warm-up step and return the report."""
+    global _report
+    with _lock:
+        steps = {}
+        ready = True
+        for name, (step, critical) in STEPS.items():
+            started = time.perf_counter()
+            try:
+                details = step()
+                steps[name] = {'status': 'ok'}
+                steps[name].update(details or {})
+            except Exception as exc:
+                logger.warning('Warm-up step %s failed', name, exc_info=True)
+                steps[name] = {'status': 'failed', 'error': f'{type(exc).__name__}: {exc}'}
+                ready = ready and not critical
+            steps[name]['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        _report = {
+            'ready': ready,
+            'timestamp': timezone.now().isoformat(),
+            'steps': steps,
+        }
+        return _report
+
+
+def get_warmup_report():
+    """
+    Return the warm-up report of this process.
+
+    Runs the warm-up if it hasn't run yet, or again if it failed, so an
+    instance whose dependencies were down at start becomes ready once they
+    are back.
+    """
+    report = _report
+    if report is None or not report['ready']:
+        report = warm_up()
+    return report
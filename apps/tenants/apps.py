@@ -1,7 +1,69 @@
+import logging
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+logger = logging.getLogger('educrowd')
+
+
+def invalidate_settings_cache(sender, instance, **kwargs):
+    """Drop the cache of a tenant whose settings changed."""
+    from apps.core.caching import invalidate_tenant_cache
+    invalidate_tenant_cache(instance.tenant.schema_name)
+
+
+def invalidate_domain_lookup(sender, instance, **kwargs):
+    """Drop the cached tenant lookups of a changed domain, tenant or settings."""
+    from .middleware import invalidate_domain_cache
+    if sender._meta.model_name == 'domain':
+        hostnames = [instance.domain]
+    else:
+        tenant = instance if sender._meta.model_name == 'tenant' else instance.tenant
+        hostnames = tenant.domains.values_list('domain', flat=True)
+    invalidate_domain_cache(hostnames)
+
+
+def invalidate_migrated_cache(sender, using, **kwargs):
+    """Drop the cache of a schema that was just migrated."""
+    from django.db import connections
+    from apps.core.caching import invalidate_tenant_cache
+    schema_name = getattr(connections[using], 'schema_name', None)
+    if not schema_name:
+        return
+    try:
+        invalidate_tenant_cache(schema_name)
+    except Exception:
+        # Migrations must not depend on the cache being reachable.
+        logger.warning('Could not invalidate the cache of %s', schema_name, exc_info=True)
 
 
 class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tenants'
     verbose_name = 'Tenants'
+
+    def ready(self):
+        from apps.core.signals import image_variants_handler
+        post_save.connect(
+            image_variants_handler('logo', 'logo_variants', 'logo'),
+            sender=self.get_model('Tenant'),
+            weak=False,
+            dispatch_uid='tenants_logo_variants'
+        )
+        post_save.connect(
+            invalidate_settings_cache,
+            sender=self.get_model('TenantSettings'),
+            dispatch_uid='tenants_settings_cache'
+        )
+        for model_name in ('Domain', 'Tenant', 'TenantSettings'):
+            model = self.get_model(model_name)
+            post_save.connect(
+                invalidate_domain_lookup,
+                sender=model,
+                dispatch_uid=f'tenants_domain_lookup_save_{model_name}'
+            )
+            post_delete.connect(
+                invalidate_domain_lookup,
+                sender=model,
+                dispatch_uid=f'tenants_domain_lookup_delete_{model_name}'
+            )
+        post_migrate.connect(invalidate_migrated_cache, sender=self)
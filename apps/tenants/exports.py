@@ -0,0 +1,29 @@
+"""
+Personal data export sources for tenants app.
+"""
+from apps.core.exports import register
+from .models import TenantAuditLog, TenantInvitation
+
+
+@register('audit_logs')
+def audit_logs(user):
+    """Audit log entries for actions the user performed."""
+    return TenantAuditLog.objects.filter(user=user).order_by('pk').values()
+
+
+@register('invitations_sent')
+def invitations_sent(user):
+    """Invitations the user sent, without their secret tokens."""
+    return TenantInvitation.objects.filter(invited_by=user).order_by('pk').values(
+        'id', 'tenant_id', 'email', 'role', 'is_accepted',
+        'expires_at', 'created_at', 'accepted_at'
+    )
+
+
+@register('invitations_accepted')
+def invitations_accepted(user):
+    """Invitations the user accepted."""
+    return TenantInvitation.objects.filter(accepted_by=user).order_by('pk').values(
+        'id', 'tenant_id', 'email', 'role', 'invited_by_id',
+        'expires_at', 'created_at', 'accepted_at'
+    )
@@ -0,0 +1,65 @@
+"""
+Tenant resolution middleware.
+"""
+from django.core.cache import cache
+from django_tenants.middleware.main import TenantMainMiddleware
+from django_tenants.utils import get_tenant_domain_model
+from apps.core.tracing import span
+
+# Seconds a hostname -> tenant lookup is cached. Changes to a domain, its
+# tenant or the tenant's settings drop the entry right away; the timeout
+# only bounds a lookup whose invalidation was missed.
+DOMAIN_CACHE_TIMEOUT = 300
+
+
+def domain_cache_key(hostname):
+    return f'tenants:domain:{hostname}'
+
+
+def _lookup(domain_model):
+    return domain_model.objects.select_related('tenant', 'tenant__tenant_settings')
+
+
+class CachedTenantMiddleware(TenantMainMiddleware):
+    """
+    TenantMainMiddleware that caches the hostname -> tenant lookup.
+
+    The tenant is cached together with its settings, so
+    request.tenant.tenant_settings needs no query either.
+    """
+
+    def get_tenant(self, domain_model, hostname):
+        with span('tenant.resolve', 'middleware', hostname=hostname):
+            key = domain_cache_key(hostname)
+            tenant = cache.get(key)
+            if tenant is None:
+                tenant = _lookup(domain_model).get(domain=hostname).tenant
+                cache.set(key, tenant, DOMAIN_CACHE_TIMEOUT)
+            return tenant
+
+
+def prime_domain_cache(limit=None):
+    """
+    Load the tenants of up to `limit` domains into the cache.
+
+    Lookups already cached are only read, which also fills the in-process
+    tier of the cache. Returns the number of domains primed.
+    """
+    domain_model = get_tenant_domain_model()
+    hostnames = list(domain_model.objects.order_by('-is_primary', 'pk').values_list('domain', flat=True)[:limit])
+    keys = {domain_cache_key(hostname): hostname for hostname in hostnames}
+    cached = cache.get_many(keys)
+    missing = [hostname for key, hostname in keys.items() if key not in cached]
+    if missing:
+        cache.set_many(
+            {
+                domain_cache_key(domain.domain): domain.tenant
+                for domain in _lookup(domain_model).filter(domain__in=missing)
+            },
+            DOMAIN_CACHE_TIMEOUT
+        )
+    return len(hostnames)
+
+
+def invalidate_domain_cache(hostnames):
+    cache.delete_many([domain_cache_key(hostname) for hostname in hostnames])
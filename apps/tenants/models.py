@@ -28,6 +28,13 @@ class Tenant(TenantMixin):
         blank=True,
         null=True
     )
+    logo_variants = models.JSONField(
+        _('logo variants'),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_('Resized logo files generated in the background')
+    )
     website = models.URLField(
         _('website'),
         blank=True
@@ -134,6 +141,9 @@ class Tenant(TenantMixin):
     @property
     def user_count(self):
         """Get number of users in this tenant."""
+        if hasattr(self, 'active_user_count'):
+            # Annotated by the queryset (see TenantSerializer).
+            return self.active_user_count
         return self.user_roles.filter(is_active=True).count()
 
     def get_feature(self, feature_name, default=False):
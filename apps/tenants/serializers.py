@@ -3,6 +3,11 @@ Serializers for tenants app.
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from apps.core.images import variant_urls
+from apps.core.serializers import DynamicFieldsMixin
+from apps.users.models import UserRole
 from .models import (
     Tenant, Domain, TenantInvitation, TenantSettings, TenantAuditLog
 )
@@ -10,18 +15,28 @@ from .models import (
 User = get_user_model()
 
 
-class TenantSerializer(serializers.ModelSerializer):
+def active_user_count():
+    """Subquery counting a tenant's active user roles, for Tenant.user_count."""
+    roles = (
+        UserRole.objects.filter(tenant=OuterRef('pk'), is_active=True)
+        .order_by().values('tenant').annotate(count=Count('pk')).values('count')
+    )
+    return Coalesce(Subquery(roles, output_field=IntegerField()), 0)
+
+
+class TenantSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Tenant serializer.
     """
     user_count = serializers.ReadOnlyField()
     is_subscription_active = serializers.ReadOnlyField()
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
+    logo_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Tenant
         fields = [
-            'id', 'name', 'description', 'logo', 'website', 'email',
+            'id', 'name', 'description', 'logo', 'logo_variants', 'website', 'email',
             'phone', 'address', 'timezone', 'language', 'currency',
             'is_active', 'created_by', 'created_by_name', 'created_at',
             'updated_at', 'settings', 'features', 'subscription_plan',
@@ -29,6 +44,17 @@ class TenantSerializer(serializers.ModelSerializer):
             'user_count', 'is_subscription_active'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'user_count']
+        field_dependencies = {
+            'user_count': (),
+            'is_subscription_active': ('subscription_status', 'subscription_expires_at'),
+            'logo_variants': ('logo_variants',),
+            'created_by_name': ('created_by__first_name', 'created_by__last_name'),
+        }
+        field_annotations = {'user_count': {'active_user_count': active_user_count()}}
+    
+    def get_logo_variants(self, obj):
+        """Get URLs of the resized logo files."""
+        return variant_urls(obj.logo_variants, self.context.get('request'))
 
 
 class TenantCreateSerializer(serializers.ModelSerializer):
@@ -128,7 +154,9 @@ class TenantInvitationCreateSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = TenantInvitation
-        fields = ['tenant', 'email', 'role', 'expires_at']
+        fields = ['id', 'tenant', 'email', 'role', 'expires_at', 'token']
+        read_only_fields = ['id', 'token']
+        extra_kwargs = {'expires_at': {'required': False}}
     
     def create(self, validated_data):
         """Create invitation with token."""
@@ -0,0 +1,28 @@
+"""
+Tests for tenants app.
+"""
+from django.test import SimpleTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from .serializers import TenantSerializer
+
+
+def get_request(query=''):
+    return Request(APIRequestFactory().get(f'/api/v1/tenants/1/{query}'))
+
+
+class TenantSerializerFieldsTests(SimpleTestCase):
+    """
+    Field selection must not change the default tenant payload.
+    """
+
+    def test_default_payload_is_unchanged(self):
+        for context in ({}, {'request': get_request()}, {'request': get_request('?expand=settings')}):
+            fields = list(TenantSerializer(context=context).fields)
+            self.assertEqual(fields, TenantSerializer.Meta.fields)
+            for name in ('user_count', 'settings', 'features'):
+                self.assertIn(name, fields)
+
+    def test_fields_trims_the_payload(self):
+        serializer = TenantSerializer(context={'request': get_request('?fields=id,name')})
+        self.assertEqual(list(serializer.fields), ['id', 'name'])
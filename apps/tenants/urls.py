@@ -20,7 +20,7 @@ urlpatterns = [
     path('invitations/', views.TenantInvitationListView.as_view(), name='invitation-list'),
     path('invitations/<int:pk>/', views.TenantInvitationDetailView.as_view(), name='invitation-detail'),
     path('invitations/accept/', views.accept_invitation, name='accept-invitation'),
-    path('invitations/send-email/', views.send_invitation_email, name='send-invitation-email'),
+    path('invitations/send-email/', views.SendInvitationEmailView.as_view(), name='send-invitation-email'),
     
     # Settings
     path('settings/', views.TenantSettingsView.as_view(), name='tenant-settings'),
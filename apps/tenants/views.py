@@ -4,9 +4,14 @@ Views for tenants app.
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from asgiref.sync import sync_to_async
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db.models import Count, Q
+from apps.core.caching import cached, tenant_key
+from apps.core.mixins import ConditionalRequestMixin, FieldSelectionMixin
+from apps.core.views import AsyncAPIView
 from .models import (
     Tenant, Domain, TenantInvitation, TenantSettings, TenantAuditLog
 )
@@ -18,7 +23,7 @@ from .serializers import (
 )
 
 
-class TenantListView(generics.ListCreateAPIView):
+class TenantListView(FieldSelectionMixin, generics.ListCreateAPIView):
     """
     List or create tenants.
     """
@@ -43,12 +48,24 @@ class TenantListView(generics.ListCreateAPIView):
         ).distinct()
 
 
-class TenantDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TenantDetailView(FieldSelectionMixin, ConditionalRequestMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a tenant.
     """
     queryset = Tenant.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    # user_count changes with user roles, not with the tenant row.
+    etag_fields = ('pk', 'updated_at', 'created_by__updated_at', 'active_user_count')
+    
+    def get_condition_queryset(self):
+        """Annotate the active user count shown in the payload."""
+        queryset = super().get_condition_queryset()
+        if 'active_user_count' in queryset.query.annotations:
+            # Already added for a requested user_count.
+            return queryset
+        return queryset.annotate(
+            active_user_count=Count('user_roles', filter=Q(user_roles__is_active=True))
+        )
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -174,12 +191,22 @@ def accept_invitation(request):
     })
 
 
-class TenantSettingsView(generics.RetrieveUpdateAPIView):
+class TenantSettingsView(ConditionalRequestMixin, generics.RetrieveUpdateAPIView):
     """
     Retrieve or update tenant settings.
     """
     serializer_class = TenantSettingsSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # get_object() creates the row on first read.
+    use_replica = False
+    etag_fields = ('pk', 'updated_at', 'tenant__updated_at')
+    
+    def get_condition_queryset(self):
+        """Get the settings of the tenant given by ?tenant_id=."""
+        tenant_id = self.request.query_params.get('tenant_id')
+        if not tenant_id or not tenant_id.isdigit():
+            return TenantSettings.objects.none()
+        return TenantSettings.objects.filter(tenant_id=tenant_id)
     
     def get_object(self):
         """Get tenant settings."""
@@ -211,21 +238,11 @@ class TenantAuditLogListView(generics.ListAPIView):
         return TenantAuditLog.objects.filter(tenant_id=tenant_id)
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def tenant_stats(request):
+@cached(timeout=60, key=lambda tenant: tenant_key('tenants:stats', tenant.schema_name))
+def get_tenant_stats(tenant):
     """
-    Get tenant statistics.
+    Calculate statistics for a tenant.
     """
-    tenant_id = request.query_params.get('tenant_id')
-    if not tenant_id:
-        return Response(
-            {'error': 'tenant_id is required'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    tenant = get_object_or_404(Tenant, id=tenant_id)
-    
     # Calculate statistics
     from apps.users.models import UserRole
     
@@ -255,38 +272,62 @@ def tenant_stats(request):
         'recent_audit_logs': TenantAuditLogSerializer(recent_audit_logs, many=True).data
     }
     
-    return Response(stats)
+    return stats
 
 
-@api_view(['POST'])
+@api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def send_invitation_email(request):
+def tenant_stats(request):
     """
-    Send invitation email.
+    Get tenant statistics.
     """
-    invitation_id = request.data.get('invitation_id')
-    if not invitation_id:
-        return Response(
-            {'error': 'invitation_id is required'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    invitation = get_object_or_404(TenantInvitation, id=invitation_id)
-    
-    if not invitation.is_valid:
+    tenant_id = request.query_params.get('tenant_id')
+    if not tenant_id:
         return Response(
-            {'error': 'Invitation is expired or already accepted'},
+            {'error': 'tenant_id is required'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Send invitation email
-    from django.core.mail import send_mail
-    from django.conf import settings
+    tenant = get_object_or_404(Tenant, id=tenant_id)
+    stats = get_tenant_stats(tenant)
     
-    invitation_url = f"{settings.FRONTEND_URL}/accept-invitation/{invitation.token}/"
+    return Response(stats)
+
+
+class SendInvitationEmailView(AsyncAPIView):
+    """
+    Send invitation email.
+    """
+    permission_classes = [permissions.IsAuthenticated]
     
-    subject = f'Invitation to join {invitation.tenant.name}'
-    message = f"""
+    async def post(self, request):
+        """Send the invitation email without holding a worker while SMTP answers."""
+        invitation_id = request.data.get('invitation_id')
+        if not invitation_id:
+            return Response(
+                {'error': 'invitation_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            invitation = await TenantInvitation.objects.select_related('tenant').aget(id=invitation_id)
+        except (TenantInvitation.DoesNotExist, ValueError):
+            raise Http404
+        
+        if not invitation.is_valid:
+            return Response(
+                {'error': 'Invitation is expired or already accepted'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Send invitation email
+        from django.core.mail import send_mail
+        from django.conf import settings
+        
+        invitation_url = f"{settings.FRONTEND_URL}/accept-invitation/{invitation.token}/"
+        
+        subject = f'Invitation to join {invitation.tenant.name}'
+        message = f"""
     Hi,
     
     You have been invited to join {invitation.tenant.name} as a {invitation.role}.
@@ -301,13 +342,15 @@ def send_invitation_email(request):
     Best regards,
     {invitation.tenant.name} Team
     """
-    
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [invitation.email],
-        fail_silently=False,
-    )
-    
-    return Response({'message': 'Invitation email sent successfully'})
+        
+        # SMTP is blocking; run it off the event loop, outside the request's
+        # database thread.
+        await sync_to_async(send_mail, thread_sensitive=False)(
+            subject,
+            message,
+            settings.DEFAULT_FROM_EMAIL,
+            [invitation.email],
+            fail_silently=False,
+        )
+        
+        return Response({'message': 'Invitation email sent successfully'})
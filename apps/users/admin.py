@@ -4,7 +4,7 @@ Admin configuration for users app.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User, UserProfile, UserRole, UserSession
+from .models import User, UserProfile, UserRole, UserSession, UserDataExport, UserImport
 
 
 @admin.register(User)
@@ -101,3 +101,39 @@ class UserSessionAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'user__username', 'session_key', 'ip_address')
     raw_id_fields = ('user',)
     readonly_fields = ('created_at', 'last_activity')
+
+
+@admin.register(UserDataExport)
+class UserDataExportAdmin(admin.ModelAdmin):
+    """
+    User Data Export admin.
+    """
+    list_display = (
+        'user', 'status', 'rows_written', 'total_rows',
+        'created_at', 'completed_at'
+    )
+    list_filter = ('status', 'created_at')
+    search_fields = ('user__email', 'user__username')
+    raw_id_fields = ('user',)
+    readonly_fields = (
+        'status', 'file', 'total_rows', 'rows_written', 'error',
+        'created_at', 'completed_at'
+    )
+
+
+@admin.register(UserImport)
+class UserImportAdmin(admin.ModelAdmin):
+    """
+    User Import admin.
+    """
+    list_display = (
+        'tenant', 'requested_by', 'status', 'created_count', 'failed_count',
+        'created_at', 'completed_at'
+    )
+    list_filter = ('status', 'created_at')
+    search_fields = ('tenant__name', 'requested_by__email')
+    raw_id_fields = ('tenant', 'requested_by')
+    readonly_fields = (
+        'status', 'file', 'created_count', 'failed_count', 'errors', 'error',
+        'created_at', 'completed_at'
+    )
@@ -1,7 +1,28 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, pre_migrate
+
+
+def create_trigram_extension(sender, using, **kwargs):
+    """Make sure pg_trgm exists before the user search indexes are built."""
+    from django.db import connections
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public')
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
     verbose_name = 'Users'
+
+    def ready(self):
+        from apps.core.signals import image_variants_handler
+        pre_migrate.connect(create_trigram_extension, sender=self)
+        post_save.connect(
+            image_variants_handler('avatar', 'avatar_variants', 'avatar'),
+            sender=self.get_model('User'),
+            weak=False,
+            dispatch_uid='users_avatar_variants'
+        )
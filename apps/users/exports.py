@@ -0,0 +1,41 @@
+"""
+Personal data export sources for users app.
+"""
+from apps.core.exports import register
+from .models import User, UserProfile, UserRole, UserSession, UserDataExport
+
+
+@register('user')
+def account(user):
+    """The user's account, without the password hash."""
+    fields = [
+        field.attname for field in User._meta.concrete_fields
+        if field.name != 'password'
+    ]
+    return User.objects.filter(pk=user.pk).values(*fields)
+
+
+@register('profile')
+def profile(user):
+    """The user's profile."""
+    return UserProfile.objects.filter(user=user).values()
+
+
+@register('roles')
+def roles(user):
+    """The user's roles in all tenants."""
+    return UserRole.objects.filter(user=user).order_by('pk').values()
+
+
+@register('sessions')
+def sessions(user):
+    """The user's tracked sessions."""
+    return UserSession.objects.filter(user=user).order_by('pk').values()
+
+
+@register('data_exports')
+def data_exports(user):
+    """Earlier data exports requested by the user."""
+    return UserDataExport.objects.filter(user=user).order_by('pk').values(
+        'id', 'status', 'total_rows', 'rows_written', 'created_at', 'completed_at'
+    )
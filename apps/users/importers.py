@@ -0,0 +1,192 @@
+"""
+Bulk user import for users app.
+"""
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from .models import User, UserProfile, UserRole
+from .serializers import UserImportRowSerializer
+
+IMPORT_BATCH_SIZE = 1000
+
+PROFILE_FIELDS = ['organization', 'job_title', 'location', 'timezone', 'language']
+
+
+def _hash_passwords(passwords, executor, workers):
+    """
+    Hash passwords, spreading the PBKDF2 work over the process pool.
+
+    Blank passwords get an unusable password, which needs no hashing.
+    """
+    hashed = [None] * len(passwords)
+    pending = [(index, raw) for index, raw in enumerate(passwords) if raw]
+    for index, raw in enumerate(passwords):
+        if not raw:
+            hashed[index] = make_password(None)
+
+    if executor is None:
+        results = map(make_password, [raw for _, raw in pending])
+    else:
+        chunksize = max(1, len(pending) // (workers * 4))
+        results = executor.map(
+            make_password, [raw for _, raw in pending], chunksize=chunksize
+        )
+
+    for (index, _), value in zip(pending, results):
+        hashed[index] = value
+    return hashed
+
+
+def _make_executor(workers):
+    """
+    Return the pool passwords are hashed in, or None to hash in-process.
+
+    Daemonic processes, such as the workers of Celery's prefork pool, can't
+    start child processes; they hash in threads instead, which still run in
+    parallel since the PBKDF2 hasher releases the GIL.
+    """
+    if workers <= 0:
+        return None
+    if multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _insert_batch(batch, tenant, assigned_by, executor, workers):
+    """Create users, profiles and roles for a batch of validated rows."""
+    passwords = _hash_passwords(
+        [data['password'] for _, data in batch], executor, workers
+    )
+
+    users = [
+        User(
+            email=data['email'],
+            username=data['username'],
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            phone_number=data['phone_number'] or None,
+            password=password,
+        )
+        for (_, data), password in zip(batch, passwords)
+    ]
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(users)
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                **{field: data[field] for field in PROFILE_FIELDS}
+            )
+            for user, (_, data) in zip(users, batch)
+        ])
+        UserRole.objects.bulk_create([
+            UserRole(
+                user=user,
+                tenant=tenant,
+                role=data['role'],
+                assigned_by=assigned_by
+            )
+            for user, (_, data) in zip(users, batch)
+        ])
+    return len(users)
+
+
+def _find_conflicts(batch):
+    """Return emails and usernames in the batch that already exist."""
+    emails = [data['email'] for _, data in batch]
+    usernames = [data['username'] for _, data in batch]
+    taken_emails = set(
+        User.objects.filter(email__in=emails).values_list('email', flat=True)
+    )
+    taken_usernames = set(
+        User.objects.filter(username__in=usernames).values_list('username', flat=True)
+    )
+    return taken_emails, taken_usernames
+
+
+def import_users(csv_file, tenant, assigned_by=None,
+                 batch_size=IMPORT_BATCH_SIZE, workers=None):
+    """
+    Import users from a CSV file into a tenant.
+
+    csv_file is a text stream with a header row; see UserImportRowSerializer
+    for the columns. Rows are streamed and written in batches of batch_size,
+    each batch in its own transaction, so a bad row never rolls back rows
+    that were already imported. Password hashing runs in a pool of workers
+    processes (one per CPU when None, in-process when 0), or threads when
+    called from a daemonic process such as a Celery worker.
+
+    Returns a dict with the number of rows created and failed and a list of
+    per-row errors keyed by the 1-based data row number.
+    """
+    result = {'created': 0, 'failed': 0, 'errors': []}
+    seen_emails = set()
+    seen_usernames = set()
+
+    def fail(row_number, errors):
+        result['failed'] += 1
+        result['errors'].append({'row': row_number, 'errors': errors})
+
+    def flush(batch):
+        taken_emails, taken_usernames = _find_conflicts(batch)
+        valid = []
+        for row_number, data in batch:
+            errors = {}
+            if data['email'] in taken_emails:
+                errors['email'] = ['A user with this email already exists.']
+            if data['username'] in taken_usernames:
+                errors['username'] = ['A user with this username already exists.']
+            if errors:
+                fail(row_number, errors)
+            else:
+                valid.append((row_number, data))
+        if not valid:
+            return
+        try:
+            result['created'] += _insert_batch(
+                valid, tenant, assigned_by, executor, workers
+            )
+        except IntegrityError as exc:
+            for row_number, _ in valid:
+                fail(row_number, {'non_field_errors': [str(exc).strip()]})
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    executor = _make_executor(workers)
+    try:
+        batch = []
+        for row_number, row in enumerate(csv.DictReader(csv_file), start=1):
+            # Short rows yield None values and long rows a None key.
+            row = {key: value for key, value in row.items() if key and value is not None}
+            serializer = UserImportRowSerializer(data=row)
+            if not serializer.is_valid():
+                fail(row_number, serializer.errors)
+                continue
+
+            data = serializer.validated_data
+            data['email'] = User.objects.normalize_email(data['email'])
+            errors = {}
+            if data['email'] in seen_emails:
+                errors['email'] = ['Duplicate email in import file.']
+            if data['username'] in seen_usernames:
+                errors['username'] = ['Duplicate username in import file.']
+            if errors:
+                fail(row_number, errors)
+                continue
+            seen_emails.add(data['email'])
+            seen_usernames.add(data['username'])
+
+            batch.append((row_number, data))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return result
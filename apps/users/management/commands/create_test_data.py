@@ -1,8 +1,15 @@
 """
 Django management command to create test data.
+
+Without options it creates an admin, a test user and one tenant. With
+--tenants it switches to scale mode and bulk loads synthetic data:
+
+    python manage.py create_test_data --tenants 1000 --users-per-tenant 5000 --audit-logs 50M
 """
+import time
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from apps.core import synthetic
 from apps.tenants.models import Tenant, Domain, TenantSettings
 from apps.users.models import UserProfile, UserRole
 
@@ -18,8 +25,41 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing test data before creating new data',
         )
+        parser.add_argument(
+            '--tenants',
+            type=synthetic.parse_count,
+            help='Scale mode: number of synthetic tenants to load with COPY',
+        )
+        parser.add_argument(
+            '--users-per-tenant',
+            type=synthetic.parse_count,
+            default=100,
+            help='Scale mode: users (with profile and role) per tenant',
+        )
+        parser.add_argument(
+            '--audit-logs',
+            type=synthetic.parse_count,
+            default=0,
+            help='Scale mode: total audit log rows, e.g. 50M',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Scale mode: seed for deterministic data',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Scale mode: parallel COPY workers (default: one per CPU)',
+        )
 
     def handle(self, *args, **options):
+        if options['tenants'] is not None:
+            self.handle_scale(options)
+            return
+
         if options['clear']:
             self.stdout.write('Clearing existing test data...')
             User.objects.filter(username__startswith='test').delete()
@@ -106,3 +146,30 @@ class Command(BaseCommand):
         self.stdout.write('Admin: admin@educrowd.com / admin123')
         self.stdout.write('User: test@educrowd.com / test123')
         self.stdout.write('\nAccess the application at: http://localhost:8000')
+
+    def handle_scale(self, options):
+        """Load production-sized synthetic data with parallel COPY."""
+        if options['clear']:
+            self.stdout.write('Clearing existing synthetic data...')
+            synthetic.clear()
+
+        start = time.monotonic()
+        loaded = synthetic.generate(
+            tenants=options['tenants'],
+            users_per_tenant=options['users_per_tenant'],
+            audit_logs=options['audit_logs'],
+            seed=options['seed'],
+            workers=options['workers'],
+            log=self.stdout.write,
+        )
+        elapsed = time.monotonic() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {loaded['tenants']:,} tenants, {loaded['users']:,} users "
+                f"and {loaded['audit_logs']:,} audit logs in {elapsed:.1f}s"
+            )
+        )
+        self.stdout.write(
+            f'Synthetic users log in with <email> / {synthetic.SYNTHETIC_PASSWORD}'
+        )
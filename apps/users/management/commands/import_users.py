@@ -0,0 +1,82 @@
+"""
+Django management command to bulk import users from a CSV file.
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from apps.tenants.models import Tenant
+from apps.users.importers import IMPORT_BATCH_SIZE, import_users
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Bulk import users, profiles and tenant roles from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the CSV file to import')
+        parser.add_argument(
+            '--tenant',
+            required=True,
+            help='ID or name of the tenant to assign roles in',
+        )
+        parser.add_argument(
+            '--assigned-by',
+            help='Email of the user recorded as assigning the roles',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Rows per insert batch (default: {IMPORT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Password hashing processes (default: one per CPU, 0 to hash in-process)',
+        )
+        parser.add_argument(
+            '--errors',
+            help='Write per-row errors as JSON to this path instead of stdout',
+        )
+
+    def handle(self, *args, **options):
+        tenant_ref = options['tenant']
+        lookup = {'id': tenant_ref} if tenant_ref.isdigit() else {'name': tenant_ref}
+        try:
+            tenant = Tenant.objects.get(**lookup)
+        except Tenant.DoesNotExist:
+            raise CommandError(f'Tenant "{tenant_ref}" does not exist')
+
+        assigned_by = None
+        if options['assigned_by']:
+            try:
+                assigned_by = User.objects.get(email=options['assigned_by'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["assigned_by"]}" does not exist')
+
+        self.stdout.write(f'Importing users into {tenant.name}...')
+        with open(options['csv_path'], encoding='utf-8-sig', newline='') as csv_file:
+            result = import_users(
+                csv_file,
+                tenant,
+                assigned_by=assigned_by,
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+            )
+
+        if result['errors']:
+            if options['errors']:
+                with open(options['errors'], 'w') as errors_file:
+                    json.dump(result['errors'], errors_file, indent=2)
+                self.stdout.write(f'Wrote row errors to {options["errors"]}')
+            else:
+                for error in result['errors']:
+                    self.stdout.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {result['created']} users")
+        )
+        if result['failed']:
+            self.stdout.write(self.style.WARNING(f"Failed {result['failed']} rows"))
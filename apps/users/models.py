@@ -1,10 +1,17 @@
 """
 User models for EduCrowd platform.
 """
+from datetime import timedelta
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+# Sessions idle for longer than this are expired.
+SESSION_IDLE_TIMEOUT = timedelta(hours=24)
+
 
 class User(AbstractUser):
     """
@@ -23,6 +30,13 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
+    avatar_variants = models.JSONField(
+        _('avatar variants'),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_('Resized avatar files generated in the background')
+    )
     date_of_birth = models.DateField(
         _('date of birth'),
         blank=True,
@@ -48,6 +62,26 @@ class User(AbstractUser):
         verbose_name = _('User')
         verbose_name_plural = _('Users')
         db_table = 'users_user'
+        # Trigram indexes over UPPER(col) so that icontains lookups, which
+        # Django compiles to UPPER(col) LIKE UPPER(%s), can use them.
+        indexes = [
+            GinIndex(
+                OpClass(Upper('email'), name='gin_trgm_ops'),
+                name='users_user_email_trgm'
+            ),
+            GinIndex(
+                OpClass(Upper('username'), name='gin_trgm_ops'),
+                name='users_user_username_trgm'
+            ),
+            GinIndex(
+                OpClass(Upper('first_name'), name='gin_trgm_ops'),
+                name='users_user_first_name_trgm'
+            ),
+            GinIndex(
+                OpClass(Upper('last_name'), name='gin_trgm_ops'),
+                name='users_user_last_name_trgm'
+            ),
+        ]
 
     def __str__(self):
         return self.email
@@ -190,6 +224,16 @@ class UserRole(models.Model):
         return timezone.now() > self.expires_at
 
 
+class UserSessionQuerySet(models.QuerySet):
+    """
+    QuerySet for user sessions.
+    """
+    def expired(self):
+        """Sessions that were logged out or have been idle too long."""
+        cutoff = timezone.now() - SESSION_IDLE_TIMEOUT
+        return self.filter(models.Q(is_active=False) | models.Q(last_activity__lt=cutoff))
+
+
 class UserSession(models.Model):
     """
     Track user sessions for security and analytics.
@@ -223,10 +267,24 @@ class UserSession(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserSessionQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('User Session')
         verbose_name_plural = _('User Sessions')
         db_table = 'users_usersession'
+        indexes = [
+            models.Index(fields=['last_activity'], name='users_session_activity_idx'),
+            models.Index(
+                fields=['last_activity'],
+                condition=models.Q(is_active=False),
+                name='users_session_inactive_idx'
+            ),
+            models.Index(
+                fields=['user', 'is_active', '-last_activity'],
+                name='users_session_user_active_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.session_key}"
@@ -234,6 +292,138 @@ class UserSession(models.Model):
     @property
     def is_expired(self):
         """Check if the session has expired."""
-        from django.utils import timezone
-        from datetime import timedelta
-        return timezone.now() > self.last_activity + timedelta(hours=24)
+        return timezone.now() > self.last_activity + SESSION_IDLE_TIMEOUT
+
+
+class UserDataExport(models.Model):
+    """
+    Background export of all data held about a user.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='data_exports'
+    )
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    file = models.FileField(
+        _('file'),
+        upload_to='exports/',
+        blank=True,
+        null=True
+    )
+    total_rows = models.PositiveIntegerField(
+        _('total rows'),
+        default=0
+    )
+    rows_written = models.PositiveIntegerField(
+        _('rows written'),
+        default=0
+    )
+    error = models.TextField(
+        _('error'),
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(
+        _('completed at'),
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = _('User Data Export')
+        verbose_name_plural = _('User Data Exports')
+        db_table = 'users_userdataexport'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user.email} - export {self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        """Return the export progress as a percentage."""
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.rows_written * 100 / self.total_rows))
+
+
+class UserImport(models.Model):
+    """
+    Background bulk import of users into a tenant from a CSV upload.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    tenant = models.ForeignKey(
+        'tenants.Tenant',
+        on_delete=models.CASCADE,
+        related_name='user_imports'
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='user_imports'
+    )
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    file = models.FileField(
+        _('file'),
+        upload_to='imports/',
+        blank=True,
+        null=True,
+        help_text=_('Uploaded CSV, deleted once the import has run')
+    )
+    created_count = models.PositiveIntegerField(
+        _('users created'),
+        default=0
+    )
+    failed_count = models.PositiveIntegerField(
+        _('rows failed'),
+        default=0
+    )
+    errors = models.JSONField(
+        _('row errors'),
+        default=list,
+        blank=True
+    )
+    error = models.TextField(
+        _('error'),
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(
+        _('completed at'),
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = _('User Import')
+        verbose_name_plural = _('User Imports')
+        db_table = 'users_userimport'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.tenant} - import {self.pk} ({self.status})"
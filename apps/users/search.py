@@ -0,0 +1,102 @@
+"""
+Trigram-backed user search for users app.
+"""
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, When
+from django.db.models.functions import Greatest
+from apps.core.lru import LRUCache
+from .models import User, UserRole
+
+SEARCH_MIN_LENGTH = 3
+SEARCH_RESULT_LIMIT = 50
+
+# Maps (tenant_id, query) to the ordered ids of matching users. Typeahead
+# clients send the same prefixes over and over, so a few seconds of
+# staleness is an acceptable trade for skipping the trigram scan.
+_search_cache = LRUCache(maxsize=512, ttl=30)
+
+
+def normalize_query(query):
+    """Lower-case and collapse whitespace in a search query."""
+    return ' '.join((query or '').split()).lower()
+
+
+def _match(query):
+    """Return a Q matching users whose email, username or name contain query."""
+    return (
+        Q(email__icontains=query) |
+        Q(username__icontains=query) |
+        Q(first_name__icontains=query) |
+        Q(last_name__icontains=query)
+    )
+
+
+def _cached_prefix_ids(tenant_id, query):
+    """
+    Return the ids cached for the longest shorter prefix of query, if any.
+
+    Only complete result sets are usable: anything containing the longer
+    query also contains its prefix, so the longer query can be answered by
+    filtering the prefix's ids instead of scanning the table again.
+    """
+    for end in range(len(query) - 1, SEARCH_MIN_LENGTH - 1, -1):
+        ids = _search_cache.get((tenant_id, query[:end]))
+        if ids is not None:
+            return ids if len(ids) < SEARCH_RESULT_LIMIT else None
+    return None
+
+
+def _search_ids(tenant_id, query):
+    """Return the ordered ids of users in the tenant matching query."""
+    key = (tenant_id, query)
+    ids = _search_cache.get(key)
+    if ids is not None:
+        return ids
+
+    queryset = User.objects.filter(
+        Exists(UserRole.objects.filter(
+            user=OuterRef('pk'),
+            tenant_id=tenant_id,
+            is_active=True
+        ))
+    )
+    prefix_ids = _cached_prefix_ids(tenant_id, query)
+    if prefix_ids is not None:
+        queryset = queryset.filter(pk__in=prefix_ids)
+
+    ids = list(
+        queryset.filter(_match(query))
+        .annotate(similarity=Greatest(
+            TrigramSimilarity('email', query),
+            TrigramSimilarity('username', query),
+            TrigramSimilarity('first_name', query),
+            TrigramSimilarity('last_name', query),
+        ))
+        .order_by('-similarity', 'pk')
+        .values_list('pk', flat=True)[:SEARCH_RESULT_LIMIT]
+    )
+    _search_cache.set(key, ids)
+    return ids
+
+
+def search_users(query, tenant_id):
+    """
+    Search users holding an active role in the tenant.
+
+    Returns a queryset ordered by trigram similarity, best match first.
+    Queries shorter than SEARCH_MIN_LENGTH cannot use the trigram indexes
+    and return no results.
+    """
+    query = normalize_query(query)
+    if len(query) < SEARCH_MIN_LENGTH:
+        return User.objects.none()
+
+    ids = _search_ids(tenant_id, query)
+    if not ids:
+        return User.objects.none()
+
+    ordering = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField()
+    )
+    return User.objects.filter(pk__in=ids).order_by(ordering)
@@ -5,25 +5,37 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from .models import User, UserProfile, UserRole, UserSession
+from apps.core.images import variant_urls
+from apps.core.serializers import DynamicFieldsMixin
+from .models import User, UserProfile, UserRole, UserSession, UserDataExport, UserImport
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     User serializer.
     """
     full_name = serializers.ReadOnlyField()
     initials = serializers.ReadOnlyField()
+    avatar_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
             'full_name', 'initials', 'phone_number', 'avatar',
-            'date_of_birth', 'bio', 'is_verified', 'is_active',
-            'created_at', 'updated_at'
+            'avatar_variants', 'date_of_birth', 'bio', 'is_verified',
+            'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'is_verified', 'created_at', 'updated_at']
+        field_dependencies = {
+            'full_name': ('first_name', 'last_name'),
+            'initials': ('first_name', 'last_name'),
+            'avatar_variants': ('avatar_variants',),
+        }
+    
+    def get_avatar_variants(self, obj):
+        """Get URLs of the resized avatar files."""
+        return variant_urls(obj.avatar_variants, self.context.get('request'))
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -55,6 +67,52 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
+class UserImportRowSerializer(serializers.Serializer):
+    """
+    Validates one CSV row of a bulk user import.
+
+    Uniqueness of email and username is checked per batch by the importer,
+    not per row here.
+    """
+    email = serializers.EmailField()
+    username = serializers.CharField(max_length=150)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    password = serializers.CharField(
+        required=False, allow_blank=True, default='',
+        validators=[validate_password],
+        help_text='Leave blank to create the user with an unusable password.'
+    )
+    phone_number = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+    role = serializers.ChoiceField(choices=UserRole.ROLE_CHOICES, default='student')
+    organization = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    job_title = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+    timezone = serializers.CharField(max_length=50, required=False, default='UTC')
+    language = serializers.CharField(max_length=10, required=False, default='en')
+
+
+class UserBulkImportSerializer(serializers.Serializer):
+    """
+    Bulk user import request serializer.
+    """
+    file = serializers.FileField()
+    tenant_id = serializers.IntegerField()
+
+
+class UserImportSerializer(serializers.ModelSerializer):
+    """
+    User Import serializer.
+    """
+    class Meta:
+        model = UserImport
+        fields = [
+            'id', 'tenant', 'status', 'created_count', 'failed_count',
+            'errors', 'error', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     """
     User update serializer.
@@ -83,7 +141,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class UserRoleSerializer(serializers.ModelSerializer):
+class UserRoleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     User Role serializer.
     """
@@ -99,6 +157,7 @@ class UserRoleSerializer(serializers.ModelSerializer):
             'assigned_at', 'expires_at'
         ]
         read_only_fields = ['id', 'assigned_at']
+        field_dependencies = {'assigned_by_name': ('assigned_by__first_name', 'assigned_by__last_name')}
 
 
 class LoginSerializer(serializers.Serializer):
@@ -195,3 +254,28 @@ class UserSessionSerializer(serializers.ModelSerializer):
             'user_agent', 'is_active', 'last_activity', 'created_at'
         ]
         read_only_fields = ['id', 'created_at', 'last_activity']
+
+
+class UserDataExportSerializer(serializers.ModelSerializer):
+    """
+    User Data Export serializer.
+    """
+    progress = serializers.ReadOnlyField()
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UserDataExport
+        fields = [
+            'id', 'status', 'progress', 'total_rows', 'rows_written',
+            'download_url', 'error', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        """Get the download URL once the export is ready."""
+        if obj.status != 'completed':
+            return None
+        from django.urls import reverse
+        url = reverse('users:user-data-export-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
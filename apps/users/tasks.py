@@ -0,0 +1,164 @@
+"""
+Celery tasks for users app.
+"""
+import io
+import logging
+import secrets
+import tempfile
+import time
+from importlib import import_module
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import File
+from django.utils import timezone
+from apps.core.exports import write_user_export
+from .importers import import_users
+from .models import UserDataExport, UserImport, UserSession
+
+logger = logging.getLogger('educrowd')
+
+SESSION_PURGE_CHUNK_SIZE = 1000
+
+
+def _purge_session_store(session_keys):
+    """Delete the Django sessions matching the given session keys."""
+    engine = import_module(settings.SESSION_ENGINE)
+    stores = [engine.SessionStore(session_key=key) for key in session_keys]
+    if stores and hasattr(stores[0], 'cache_key'):
+        # Cache-backed sessions can go in a single round trip.
+        caches[settings.SESSION_CACHE_ALIAS].delete_many(
+            [store.cache_key for store in stores]
+        )
+        return
+    for store in stores:
+        store.delete()
+
+
+@shared_task(ignore_result=True, priority_queue='low')
+def purge_expired_sessions(chunk_size=SESSION_PURGE_CHUNK_SIZE, pause=0.05):
+    """
+    Delete logged-out and idle user sessions in small chunks.
+
+    Each chunk picks its rows through the last_activity indexes and deletes
+    them by primary key in its own short transaction, so the sweep never
+    holds locks on more than chunk_size rows at a time. The matching
+    Django sessions are purged from the session store along with them.
+    Returns the number of sessions deleted.
+    """
+    deleted = 0
+    while True:
+        chunk = list(
+            UserSession.objects.expired()
+            .values_list('pk', 'session_key')[:chunk_size]
+        )
+        if not chunk:
+            break
+
+        pks = [pk for pk, _ in chunk]
+        _purge_session_store([session_key for _, session_key in chunk])
+        UserSession.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+
+        if len(chunk) < chunk_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    logger.info('Purged %d expired user sessions', deleted)
+    return deleted
+
+
+@shared_task(
+    ignore_result=True,
+    priority_queue='low',
+    tenant_fair=True,
+    task_key=lambda export_id: export_id
+)
+def export_user_data(export_id):
+    """
+    Build the personal data archive for a UserDataExport.
+
+    The archive is spooled to a temporary file and then handed to the
+    default storage under an unguessable name. Progress is written to the
+    export row as chunks complete.
+    """
+    export = UserDataExport.objects.select_related('user').get(pk=export_id)
+    UserDataExport.objects.filter(pk=export.pk).update(status='running')
+
+    def progress(rows_written, total_rows):
+        UserDataExport.objects.filter(pk=export.pk).update(
+            rows_written=rows_written,
+            total_rows=total_rows
+        )
+
+    try:
+        with tempfile.TemporaryFile() as archive:
+            rows_written = write_user_export(export.user, archive, progress)
+            archive.seek(0)
+            export.file.save(
+                f'{export.user.pk}-{secrets.token_urlsafe(24)}.zip',
+                File(archive),
+                save=False
+            )
+    except Exception as exc:
+        logger.exception('Data export %s failed', export.pk)
+        UserDataExport.objects.filter(pk=export.pk).update(
+            status='failed',
+            error=str(exc)
+        )
+        return
+
+    UserDataExport.objects.filter(pk=export.pk).update(
+        status='completed',
+        file=export.file.name,
+        rows_written=rows_written,
+        completed_at=timezone.now()
+    )
+
+
+@shared_task(
+    ignore_result=True,
+    priority_queue='low',
+    tenant_fair=True,
+    task_key=lambda import_id: import_id
+)
+def import_users_file(import_id):
+    """
+    Run a UserImport and record its per-row results.
+
+    Passwords are hashed by a pool of one thread per CPU inside the task,
+    as the worker process can't fork a process pool of its own. The
+    uploaded CSV may hold passwords, so it is deleted from storage once
+    the import has run.
+    """
+    user_import = UserImport.objects.select_related('tenant', 'requested_by').get(pk=import_id)
+    UserImport.objects.filter(pk=user_import.pk).update(status='running')
+
+    try:
+        with user_import.file.open('rb') as upload:
+            result = import_users(
+                io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''),
+                user_import.tenant,
+                assigned_by=user_import.requested_by
+            )
+    except Exception as exc:
+        logger.exception('User import %s failed', user_import.pk)
+        user_import.file.delete(save=False)
+        UserImport.objects.filter(pk=user_import.pk).update(
+            status='failed',
+            file='',
+            error=str(exc),
+            completed_at=timezone.now()
+        )
+        return
+
+    user_import.file.delete(save=False)
+    UserImport.objects.filter(pk=user_import.pk).update(
+        status='completed',
+        file='',
+        created_count=result['created'],
+        failed_count=result['failed'],
+        errors=result['errors'],
+        completed_at=timezone.now()
+    )
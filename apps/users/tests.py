@@ -0,0 +1,37 @@
+"""
+Tests for users app.
+"""
+from django.test import SimpleTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from .serializers import UserRoleSerializer, UserSerializer
+
+
+def get_request(query=''):
+    return Request(APIRequestFactory().get(f'/api/v1/auth/roles/{query}'))
+
+
+class UserRoleSerializerFieldsTests(SimpleTestCase):
+    """
+    Field selection must not change the default user role payload.
+    """
+    DEFAULT_FIELDS = [
+        'id', 'user', 'tenant', 'tenant_name', 'role', 'is_active',
+        'assigned_by', 'assigned_by_name', 'assigned_at', 'expires_at'
+    ]
+
+    def test_default_payload_is_unchanged(self):
+        for context in ({}, {'request': get_request()}, {'request': get_request('?expand=user')}):
+            serializer = UserRoleSerializer(context=context)
+            self.assertEqual(list(serializer.fields), self.DEFAULT_FIELDS)
+            self.assertIsInstance(serializer.fields['user'], UserSerializer)
+            self.assertEqual(list(serializer.fields['user'].fields), UserSerializer.Meta.fields)
+
+    def test_fields_trims_the_payload(self):
+        serializer = UserRoleSerializer(context={'request': get_request('?fields=id,role')})
+        self.assertEqual(list(serializer.fields), ['id', 'role'])
+
+    def test_fields_selects_nested_user_fields(self):
+        serializer = UserRoleSerializer(context={'request': get_request('?fields=id,user.email')})
+        self.assertEqual(list(serializer.fields), ['id', 'user'])
+        self.assertEqual(list(serializer.fields['user'].fields), ['email'])
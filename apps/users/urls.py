@@ -2,6 +2,7 @@
 URL configuration for users app.
 """
 from django.urls import path
+from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
 app_name = 'users'
@@ -10,12 +11,15 @@ urlpatterns = [
     # User management
     path('register/', views.UserCreateView.as_view(), name='user-register'),
     path('users/', views.UserListView.as_view(), name='user-list'),
+    path('users/import/', views.UserBulkImportView.as_view(), name='user-bulk-import'),
+    path('users/import/<int:pk>/', views.UserImportDetailView.as_view(), name='user-import-detail'),
     path('users/<int:pk>/', views.UserDetailView.as_view(), name='user-detail'),
     path('profile/', views.UserProfileView.as_view(), name='user-profile'),
     
     # Authentication
     path('login/', views.LoginView.as_view(), name='login'),
     path('logout/', views.LogoutView.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     
     # Password management
     path('password/change/', views.PasswordChangeView.as_view(), name='password-change'),
@@ -28,4 +32,9 @@ urlpatterns = [
     # User roles and sessions
     path('roles/', views.UserRoleListView.as_view(), name='user-role-list'),
     path('sessions/', views.UserSessionListView.as_view(), name='user-session-list'),
+    
+    # Personal data exports
+    path('exports/', views.UserDataExportListView.as_view(), name='user-data-export-list'),
+    path('exports/<int:pk>/', views.UserDataExportDetailView.as_view(), name='user-data-export-detail'),
+    path('exports/<int:pk>/download/', views.UserDataExportDownloadView.as_view(), name='user-data-export-download'),
 ]
@@ -12,14 +12,22 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404
-from .models import User, UserProfile, UserRole, UserSession
+from django.urls import reverse
+from django_tenants.utils import get_public_schema_name
+from apps.core.mixins import ConditionalRequestMixin, FieldSelectionMixin
+from .models import User, UserProfile, UserRole, UserSession, UserDataExport, UserImport
+from .search import search_users
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer,
     UserProfileSerializer, UserRoleSerializer, LoginSerializer,
     PasswordChangeSerializer, PasswordResetSerializer,
-    PasswordResetConfirmSerializer, UserSessionSerializer
+    PasswordResetConfirmSerializer, UserSessionSerializer,
+    UserBulkImportSerializer, UserImportSerializer, UserDataExportSerializer
 )
+from .tasks import export_user_data, import_users_file
 
 
 class UserCreateView(generics.CreateAPIView):
@@ -81,14 +89,103 @@ class UserCreateView(generics.CreateAPIView):
 
 class UserListView(generics.ListAPIView):
     """
-    List all users.
+    List all users, or search users within a tenant.
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Search users of the requester's tenant when ?search= is given."""
+        query = self.request.query_params.get('search')
+        if query is None:
+            return super().get_queryset()
+        
+        tenant_id = self.get_search_tenant_id()
+        if not tenant_id:
+            return User.objects.none()
+        
+        user = self.request.user
+        if not user.is_superuser and not UserRole.objects.filter(
+            user=user,
+            tenant_id=tenant_id,
+            is_active=True
+        ).exists():
+            return User.objects.none()
+        
+        return search_users(query, tenant_id)
+    
+    def filter_queryset(self, queryset):
+        """Keep the similarity ordering of search results."""
+        if 'search' in self.request.query_params:
+            return queryset
+        return super().filter_queryset(queryset)
+    
+    def get_search_tenant_id(self):
+        """Get tenant from ?tenant_id= or the tenant resolved from the domain."""
+        tenant_id = self.request.query_params.get('tenant_id')
+        if tenant_id:
+            return int(tenant_id) if tenant_id.isdigit() else None
+        
+        tenant = getattr(self.request, 'tenant', None)
+        if tenant is None or tenant.schema_name == get_public_schema_name():
+            return None
+        return tenant.pk
+
+
+class UserBulkImportView(APIView):
+    """
+    Bulk import users into a tenant from a CSV upload.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        """Start a background import and return its status resource."""
+        serializer = UserBulkImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        from apps.tenants.models import Tenant
+        tenant = get_object_or_404(Tenant, id=serializer.validated_data['tenant_id'])
+        
+        user = request.user
+        if not user.is_superuser and not UserRole.objects.filter(
+            user=user,
+            tenant=tenant,
+            role__in=['super_admin', 'admin'],
+            is_active=True
+        ).exists():
+            return Response(
+                {'error': 'Only tenant admins can import users'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        user_import = UserImport.objects.create(
+            tenant=tenant,
+            requested_by=user,
+            file=serializer.validated_data['file']
+        )
+        transaction.on_commit(lambda: import_users_file.delay(user_import.pk))
+        
+        return Response(
+            UserImportSerializer(user_import).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('users:user-import-detail', args=[user_import.pk])}
+        )
 
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserImportDetailView(generics.RetrieveAPIView):
+    """
+    Retrieve the status and results of a bulk import.
+    """
+    serializer_class = UserImportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Get the imports the user started."""
+        return UserImport.objects.filter(requested_by=self.request.user)
+
+
+class UserDetailView(ConditionalRequestMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a user.
     """
@@ -103,12 +200,19 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
         return UserSerializer
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(ConditionalRequestMixin, generics.RetrieveUpdateAPIView):
     """
     Retrieve or update user profile.
     """
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # get_object() creates the row on first read.
+    use_replica = False
+    etag_fields = ('pk', 'updated_at', 'user__updated_at')
+    
+    def get_condition_queryset(self):
+        """Get the requesting user's profile."""
+        return UserProfile.objects.filter(user=self.request.user)
     
     def get_object(self):
         """Get or create user profile."""
@@ -321,7 +425,7 @@ def verify_email(request):
     return Response({'message': 'Email verified successfully'})
 
 
-class UserRoleListView(generics.ListCreateAPIView):
+class UserRoleListView(FieldSelectionMixin, generics.ListCreateAPIView):
     """
     List or create user roles.
     """
@@ -350,3 +454,64 @@ class UserSessionListView(generics.ListAPIView):
             user=self.request.user,
             is_active=True
         ).order_by('-last_activity')
+
+
+class UserDataExportListView(generics.ListCreateAPIView):
+    """
+    List or request exports of the user's data.
+    """
+    serializer_class = UserDataExportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Get the user's exports."""
+        return UserDataExport.objects.filter(user=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        """Start a new export unless one is already in progress."""
+        if self.get_queryset().filter(status__in=['pending', 'running']).exists():
+            return Response(
+                {'error': 'An export is already in progress'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        export = UserDataExport.objects.create(user=request.user)
+        transaction.on_commit(lambda: export_user_data.delay(export.pk))
+        
+        return Response(
+            self.get_serializer(export).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class UserDataExportDetailView(generics.RetrieveAPIView):
+    """
+    Retrieve the status and progress of a data export.
+    """
+    serializer_class = UserDataExportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Get the user's exports."""
+        return UserDataExport.objects.filter(user=self.request.user)
+
+
+class UserDataExportDownloadView(APIView):
+    """
+    Download a completed data export.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        """Stream the export archive."""
+        export = get_object_or_404(
+            UserDataExport,
+            pk=pk,
+            user=request.user,
+            status='completed'
+        )
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=f'educrowd-data-export-{export.pk}.zip'
+        )
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+"""
+EduCrowd ASGI vs WSGI Benchmark
+===============================
+
+Starts the API twice from this checkout, once under gunicorn with sync
+workers (WSGI) and once under gunicorn with uvicorn workers (ASGI), each
+with the same number of worker processes. It then sends the same
+concurrent load of slow, I/O-bound requests to both:
+
+    invitation_email  POST /api/v1/tenants/invitations/send-email/
+                      against a local SMTP sink that answers after --smtp-delay
+    deep_health       GET /api/v1/core/health/deep/
+
+Setup:
+    docker-compose up -d db redis
+    python manage.py migrate
+    python manage.py create_test_data
+
+Usage:
+    python benchmarks/asgi_benchmark.py
+    python benchmarks/asgi_benchmark.py --workers 2 --concurrency 100 --smtp-delay 0.5
+
+Results are printed and written to benchmarks/results/.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loadtest import RESULTS_DIR, Client, Stats, percentile
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'wsgi': ('educrowd.wsgi:application', 'sync'),
+    'asgi': ('educrowd.asgi:application', 'uvicorn.workers.UvicornWorker'),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class SMTPSink:
+    """
+    Minimal SMTP server that accepts every message after a fixed delay.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.port = free_port()
+        self.received = 0
+
+    async def handle(self, reader, writer):
+        writer.write(b'220 sink ESMTP\r\n')
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command in (b'EHLO', b'HELO'):
+                writer.write(b'250 sink\r\n')
+            elif command == b'DATA':
+                writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                await writer.drain()
+                while await reader.readline() not in (b'.\r\n', b''):
+                    pass
+                await asyncio.sleep(self.delay)
+                self.received += 1
+                writer.write(b'250 OK\r\n')
+            elif command == b'QUIT':
+                writer.write(b'221 Bye\r\n')
+                await writer.drain()
+                break
+            else:
+                writer.write(b'250 OK\r\n')
+            await writer.drain()
+        writer.close()
+
+    def start(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(asyncio.start_server(self.handle, '127.0.0.1', self.port))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+
+
+def start_server(mode, port, options, smtp_port):
+    """Start gunicorn for one mode and wait until it answers."""
+    app, worker_class = SERVERS[mode]
+    env = dict(
+        os.environ,
+        EMAIL_HOST='127.0.0.1',
+        EMAIL_PORT=str(smtp_port),
+        EMAIL_USE_TLS='False',
+        EMAIL_HOST_USER='',
+        NPLUSONE_DETECTION='off',
+        GUNICORN_ACCESS_LOG='',
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', app,
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(options.workers),
+            '--worker-class', worker_class,
+        ],
+        cwd=PROJECT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f'{mode} server exited with status {process.returncode}')
+        status, _ = Client(base_url, Stats()).request('ready', 'GET', '/api/v1/core/health/')
+        if status == 200:
+            return process, base_url
+        time.sleep(0.5)
+    process.terminate()
+    sys.exit(f'{mode} server did not start within 60s')
+
+
+def create_invitation(base_url, options):
+    """Log in and create the invitation whose email the benchmark resends."""
+    admin = Client(base_url, Stats())
+    if not admin.login(options.email, options.password):
+        sys.exit(f'Could not log in as {options.email}')
+    tenant_id = options.tenant_id
+    if tenant_id is None:
+        _, data = admin.request('setup', 'GET', '/api/v1/tenants/')
+        results = (data or {}).get('results') or []
+        if not results:
+            sys.exit('No tenant found; run "python manage.py create_test_data" first')
+        tenant_id = results[0]['id']
+    status, data = admin.request('setup', 'POST', '/api/v1/tenants/invitations/', {
+        'tenant': tenant_id,
+        'email': f'asgi-bench-{uuid.uuid4().hex[:8]}@example.com',
+        'role': 'viewer',
+    })
+    if status != 201:
+        sys.exit(f'Could not create an invitation ({status}): {data}')
+    return admin.access, data['id']
+
+
+def run_load(base_url, endpoint, access, invitation_id, options):
+    """Send requests from `concurrency` clients for `duration` seconds."""
+    stats = Stats()
+    deadline = time.monotonic() + options.duration
+
+    def user():
+        client = Client(base_url, stats)
+        client.access = access
+        while time.monotonic() < deadline:
+            if endpoint == 'invitation_email':
+                client.request(endpoint, 'POST', '/api/v1/tenants/invitations/send-email/',
+                               {'invitation_id': invitation_id})
+            else:
+                client.request(endpoint, 'GET', '/api/v1/core/health/deep/')
+
+    threads = [threading.Thread(target=user) for _ in range(options.concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies = sorted(stats.latencies[endpoint])
+    return {
+        'requests': len(latencies),
+        'errors': stats.errors[endpoint],
+        'throughput': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EduCrowd ASGI vs WSGI benchmark')
+    parser.add_argument('--email', default='admin@educrowd.com')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--tenant-id', type=int, help='Tenant to invite into (default: first listed)')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes per server (default: 2)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients (default: 50)')
+    parser.add_argument('--duration', type=int, default=20, help='Seconds per endpoint and mode')
+    parser.add_argument('--smtp-delay', type=float, default=0.2, help='Seconds the SMTP sink takes per message')
+    parser.add_argument('--endpoints', nargs='+', default=['invitation_email', 'deep_health'],
+                        choices=['invitation_email', 'deep_health'])
+    parser.add_argument('--output', help='Where to write the results JSON')
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.smtp_delay)
+    sink.start()
+
+    results = {}
+    invitation = None
+    for mode in SERVERS:
+        process, base_url = start_server(mode, free_port(), args, sink.port)
+        try:
+            if invitation is None:
+                invitation = create_invitation(base_url, args)
+            access, invitation_id = invitation
+            for endpoint in args.endpoints:
+                print(f'{mode}: {endpoint} with {args.concurrency} clients for {args.duration}s...')
+                results.setdefault(endpoint, {})[mode] = run_load(
+                    base_url, endpoint, access, invitation_id, args
+                )
+        finally:
+            process.terminate()
+            process.wait()
+
+    print()
+    print(f"{'endpoint':<18}{'mode':<6}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+    for endpoint, modes in results.items():
+        for mode, row in modes.items():
+            print(
+                f"{endpoint:<18}{mode:<6}{row['throughput']:>9.1f}{row['p50_ms']:>8.0f}ms"
+                f"{row['p95_ms']:>8.0f}ms{row['p99_ms']:>8.0f}ms{row['errors']:>8}"
+            )
+
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'options': vars(args),
+        'results': results,
+    }
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"asgi-vs-wsgi-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f'\nResults written to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
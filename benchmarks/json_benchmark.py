@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+EduCrowd JSON Micro-Benchmark
+=============================
+
+Compares DRF's stdlib JSONRenderer/JSONParser with the orjson-backed
+FastJSONRenderer/FastJSONParser on real list payloads: tenants, audit logs
+and users, serialized from the database by the API's own serializers.
+
+Setup:
+    docker-compose up -d db
+    python manage.py migrate
+    python manage.py create_test_data --tenants 100 --users-per-tenant 100 --audit-logs 100K
+
+Usage:
+    python benchmarks/json_benchmark.py
+    python benchmarks/json_benchmark.py --rows 1000 --repeat 50
+
+For every payload the script checks that both renderers produce identical
+bytes, then reports the best time per render and parse.
+"""
+import argparse
+import io
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'educrowd.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from apps.core.parsers import FastJSONParser  # noqa: E402
+from apps.core.renderers import FastJSONRenderer, orjson  # noqa: E402
+from apps.tenants.models import Tenant, TenantAuditLog  # noqa: E402
+from apps.tenants.serializers import TenantAuditLogSerializer, TenantSerializer  # noqa: E402
+from apps.users.serializers import UserSerializer  # noqa: E402
+
+
+def load_payloads(rows):
+    """Serialize up to `rows` objects per endpoint, like the list views do."""
+    User = get_user_model()
+    return {
+        'tenants': TenantSerializer(Tenant.objects.order_by('id')[:rows], many=True).data,
+        'audit_logs': TenantAuditLogSerializer(
+            TenantAuditLog.objects.order_by('-created_at')[:rows], many=True
+        ).data,
+        'users': UserSerializer(User.objects.order_by('id')[:rows], many=True).data,
+    }
+
+
+def best_of(func, repeat, number):
+    """Return the best seconds per call over `repeat` runs of `number` calls."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EduCrowd JSON renderer/parser benchmark')
+    parser.add_argument('--rows', type=int, default=500, help='Objects per payload (default: 500)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timing runs; the best one counts')
+    parser.add_argument('--number', type=int, default=10, help='Calls per timing run')
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson is not installed; the fast classes fall back to the stdlib path.')
+
+    stdlib_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    stdlib_parser, fast_parser = JSONParser(), FastJSONParser()
+
+    print(f"{'payload':<12}{'rows':>7}{'size':>10}  {'op':<7}{'stdlib':>11}{'fast':>11}{'speedup':>9}")
+    for name, data in load_payloads(args.rows).items():
+        body = stdlib_renderer.render(data)
+        if fast_renderer.render(data) != body:
+            print(f'{name}: renderers disagree on the output', file=sys.stderr)
+            return 1
+
+        timings = {
+            'render': (
+                best_of(lambda: stdlib_renderer.render(data), args.repeat, args.number),
+                best_of(lambda: fast_renderer.render(data), args.repeat, args.number),
+            ),
+            'parse': (
+                best_of(lambda: stdlib_parser.parse(io.BytesIO(body)), args.repeat, args.number),
+                best_of(lambda: fast_parser.parse(io.BytesIO(body)), args.repeat, args.number),
+            ),
+        }
+        for op, (stdlib, fast) in timings.items():
+            print(
+                f'{name:<12}{len(data):>7}{len(body) / 1024:>8.1f}KB  {op:<7}'
+                f'{stdlib * 1000:>9.3f}ms{fast * 1000:>9.3f}ms{stdlib / fast:>8.1f}x'
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+"""
+EduCrowd API Load Test
+======================
+
+Drives realistic API flows against a running server and reports throughput
+and p50/p95/p99 latency per endpoint. Only the standard library is used, so
+the harness runs from any Python 3.8+ without installing the project.
+
+Flows (weighted per iteration):
+    login, token refresh, tenant list, tenant stats,
+    audit-log paging and invitation acceptance
+
+Setup:
+    docker-compose up -d db redis
+    python manage.py migrate
+    python manage.py create_test_data
+    python manage.py runserver            # or gunicorn, see DEPLOYMENT.md
+
+Usage:
+    python benchmarks/loadtest.py --duration 60 --users 20
+    python benchmarks/loadtest.py --save-baseline
+    python benchmarks/loadtest.py --baseline benchmarks/baseline.json
+
+The run is written to benchmarks/results/. When a baseline is given, the
+script exits with status 1 if any endpoint regressed beyond --tolerance.
+"""
+import argparse
+import csv
+import http.client
+import io
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCHMARKS_DIR / 'results'
+DEFAULT_BASELINE = BENCHMARKS_DIR / 'baseline.json'
+
+INVITEE_PASSWORD = 'LoadTest-Passw0rd!'
+
+FLOW_WEIGHTS = {
+    'tenant_list': 30,
+    'audit_logs': 25,
+    'tenant_stats': 20,
+    'token_refresh': 10,
+    'login': 10,
+    'accept_invitation': 5,
+}
+
+
+class Stats:
+    """
+    Thread-safe latency and error collection per endpoint.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, latency, ok):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    """
+    Keep-alive JSON client for one virtual user.
+    """
+
+    def __init__(self, base_url, stats):
+        parts = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(parts.netloc, timeout=30)
+        self.prefix = parts.path.rstrip('/')
+        self.host = parts.netloc
+        self.stats = stats
+        self.access = None
+        self.refresh = None
+
+    def request(self, endpoint, method, path, body=None, query=None,
+                content_type='application/json', token=None):
+        """Send a request, record its latency and return (status, data)."""
+        url = self.prefix + path
+        if query:
+            url += '?' + urlencode(query)
+        headers = {'Accept': 'application/json', 'Host': self.host}
+        if token is None:
+            token = self.access
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        if body is not None:
+            if content_type == 'application/json':
+                body = json.dumps(body).encode()
+            headers['Content-Type'] = content_type
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, url, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            status, payload = 0, b''
+        latency = time.perf_counter() - started
+
+        self.stats.record(endpoint, latency, 200 <= status < 400)
+        try:
+            data = json.loads(payload) if payload else None
+        except ValueError:
+            data = None
+        return status, data
+
+    def login(self, email, password, endpoint='login'):
+        status, data = self.request(
+            endpoint, 'POST', '/api/v1/auth/login/',
+            {'email': email, 'password': password}, token=''
+        )
+        if status == 200:
+            self.access = data['tokens']['access']
+            self.refresh = data['tokens']['refresh']
+        return status == 200
+
+
+class LoadTest:
+    """
+    Runs the weighted flows from a pool of virtual users.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.stats = Stats()
+        self.tenant_id = options.tenant_id
+        self.invitees = []
+        self.invitee_lock = threading.Lock()
+        self.deadline = None
+
+    # Setup
+
+    def setup(self):
+        """Resolve the tenant and import the users invitations go to."""
+        admin = Client(self.options.base_url, Stats())
+        if not admin.login(self.options.email, self.options.password):
+            sys.exit(f'Could not log in as {self.options.email}')
+
+        if self.tenant_id is None:
+            status, data = admin.request('setup', 'GET', '/api/v1/tenants/')
+            results = (data or {}).get('results') or []
+            if not results:
+                sys.exit('No tenant found; run "python manage.py create_test_data" first')
+            self.tenant_id = results[0]['id']
+
+        if self.options.invitees:
+            run_id = uuid.uuid4().hex[:8]
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(['email', 'username', 'first_name', 'last_name', 'password', 'role'])
+            for number in range(self.options.invitees):
+                email = f'loadtest-{run_id}-{number}@example.com'
+                writer.writerow([email, f'loadtest-{run_id}-{number}', 'Load', 'Test', INVITEE_PASSWORD, 'student'])
+                self.invitees.append(email)
+
+            boundary = uuid.uuid4().hex
+            body = (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="tenant_id"\r\n\r\n'
+                f'{self.tenant_id}\r\n'
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="invitees.csv"\r\n'
+                f'Content-Type: text/csv\r\n\r\n{buffer.getvalue()}\r\n--{boundary}--\r\n'
+            ).encode()
+            status, _ = admin.request(
+                'setup', 'POST', '/api/v1/auth/users/import/', body,
+                content_type=f'multipart/form-data; boundary={boundary}'
+            )
+            if status != 201:
+                print(f'Importing invitees failed ({status}); skipping invitation flow')
+                self.invitees = []
+
+    # Flows
+
+    def flow_login(self, client):
+        client.login(self.options.email, self.options.password)
+
+    def flow_token_refresh(self, client):
+        status, data = client.request(
+            'token_refresh', 'POST', '/api/v1/auth/token/refresh/',
+            {'refresh': client.refresh}, token=''
+        )
+        if status == 200:
+            client.access = data['access']
+            client.refresh = data.get('refresh', client.refresh)
+
+    def flow_tenant_list(self, client):
+        client.request('tenant_list', 'GET', '/api/v1/tenants/')
+
+    def flow_tenant_stats(self, client):
+        client.request('tenant_stats', 'GET', '/api/v1/tenants/stats/', query={'tenant_id': self.tenant_id})
+
+    def flow_audit_logs(self, client):
+        for page in range(1, self.options.audit_pages + 1):
+            status, data = client.request(
+                'audit_logs', 'GET', '/api/v1/tenants/audit-logs/',
+                query={'tenant_id': self.tenant_id, 'page': page}
+            )
+            if status != 200 or not (data or {}).get('next'):
+                break
+
+    def flow_accept_invitation(self, client):
+        with self.invitee_lock:
+            if not self.invitees:
+                return
+            email = self.invitees.pop()
+
+        status, data = client.request(
+            'invitation_create', 'POST', '/api/v1/tenants/invitations/',
+            {'tenant': self.tenant_id, 'email': email, 'role': 'viewer'}
+        )
+        if status != 201:
+            return
+
+        invitee = Client(self.options.base_url, self.stats)
+        if invitee.login(email, INVITEE_PASSWORD, endpoint='invitee_login'):
+            invitee.request(
+                'accept_invitation', 'POST', '/api/v1/tenants/invitations/accept/',
+                {'token': data['token']}
+            )
+        invitee.connection.close()
+
+    # Running
+
+    def virtual_user(self, seed):
+        rng = random.Random(seed)
+        client = Client(self.options.base_url, self.stats)
+        if not client.login(self.options.email, self.options.password):
+            return
+        flows = list(FLOW_WEIGHTS)
+        weights = [FLOW_WEIGHTS[flow] for flow in flows]
+        while time.monotonic() < self.deadline:
+            flow = rng.choices(flows, weights)[0]
+            getattr(self, f'flow_{flow}')(client)
+        client.connection.close()
+
+    def run(self):
+        self.setup()
+        print(
+            f'Running {self.options.users} users for {self.options.duration}s '
+            f'against {self.options.base_url} (tenant {self.tenant_id})'
+        )
+        started = time.monotonic()
+        self.deadline = started + self.options.duration
+        threads = [
+            threading.Thread(target=self.virtual_user, args=(self.options.seed + number,))
+            for number in range(self.options.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.summarize(time.monotonic() - started)
+
+    def summarize(self, elapsed):
+        endpoints = {}
+        for endpoint, latencies in sorted(self.stats.latencies.items()):
+            latencies.sort()
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'errors': self.stats.errors[endpoint],
+                'throughput_rps': round(len(latencies) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            }
+        return {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'base_url': self.options.base_url,
+                'users': self.options.users,
+                'duration_s': round(elapsed, 2),
+                'seed': self.options.seed,
+            },
+            'endpoints': endpoints,
+        }
+
+
+def print_report(results):
+    print()
+    print(f"{'endpoint':<20} {'reqs':>7} {'errs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print('-' * 74)
+    for endpoint, row in results['endpoints'].items():
+        print(
+            f"{endpoint:<20} {row['requests']:>7} {row['errors']:>6} {row['throughput_rps']:>8} "
+            f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}"
+        )
+
+
+def compare(results, baseline, tolerance):
+    """Return regressions of results against baseline, as readable lines."""
+    regressions = []
+    for endpoint, base in baseline['endpoints'].items():
+        current = results['endpoints'].get(endpoint)
+        if current is None:
+            continue
+        for metric in ('p95_ms', 'p99_ms'):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{endpoint}: {metric} {base[metric]} -> {current[metric]}')
+        if base['throughput_rps'] and current['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: throughput_rps {base['throughput_rps']} -> {current['throughput_rps']}"
+            )
+        base_rate = base['errors'] / base['requests'] if base['requests'] else 0
+        rate = current['errors'] / current['requests'] if current['requests'] else 0
+        if rate > base_rate + 0.01:
+            regressions.append(f'{endpoint}: error rate {base_rate:.2%} -> {rate:.2%}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EduCrowd API load test')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--email', default='admin@educrowd.com')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--tenant-id', type=int, help='Tenant to exercise (default: first listed)')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=int, default=30, help='Seconds to run')
+    parser.add_argument('--audit-pages', type=int, default=5, help='Audit log pages per paging flow')
+    parser.add_argument('--invitees', type=int, default=200, help='Users imported for the invitation flow')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Where to write the results JSON')
+    parser.add_argument('--baseline', help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Also write the results to {DEFAULT_BASELINE}')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed relative regression (default: 0.15)')
+    options = parser.parse_args()
+
+    results = LoadTest(options).run()
+    print_report(results)
+
+    output = Path(options.output) if options.output else (
+        RESULTS_DIR / f"loadtest-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f'\nResults written to {output}')
+
+    if options.save_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(results, indent=2))
+        print(f'Baseline written to {DEFAULT_BASELINE}')
+
+    if options.baseline:
+        regressions = compare(results, json.loads(Path(options.baseline).read_text()), options.tolerance)
+        if regressions:
+            print('\nRegressions against baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print('\nNo regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
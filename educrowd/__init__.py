@@ -1 +1,7 @@
 # EduCrowd - Multi-Tenant SaaS + LMS + Crowdfunding Platform
+
+# Load the Celery app whenever Django starts, so tasks sent from the web
+# processes use its configuration and task class.
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
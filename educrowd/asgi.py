@@ -7,5 +7,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'educrowd.settings')
+os.environ.setdefault('EDUCROWD_ASGI', '1')
 
 application = get_asgi_application()
@@ -3,11 +3,14 @@ Celery configuration for EduCrowd project.
 """
 import os
 from celery import Celery
+from celery.signals import worker_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'educrowd.settings')
 
-app = Celery('educrowd')
+# Every task is tenant aware, routed by priority and counted per queue;
+# see apps/core/taskbase.py.
+app = Celery('educrowd', task_cls='apps.core.taskbase:TenantTask')
 
 # Using a string here means the worker doesn't have to serialize
 # the configuration object to child processes.
@@ -17,6 +20,15 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    """Expose the worker's task metrics when CELERY_METRICS_PORT is set."""
+    from django.conf import settings
+    if settings.CELERY_METRICS_PORT:
+        from apps.core.metrics import serve_metrics
+        serve_metrics(settings.CELERY_METRICS_PORT)
+
+
 @app.task(bind=True)
 def debug_task(self):
     """Debug task for testing Celery."""
@@ -5,6 +5,8 @@ Django settings for EduCrowd project.
 import os
 from pathlib import Path
 from decouple import config
+from corsheaders.defaults import default_headers
+from kombu import Queue
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -26,6 +28,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -53,7 +56,11 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
-    'django_tenants.middleware.main.TenantMainMiddleware',
+    'apps.core.middleware.TracingMiddleware',
+    'apps.tenants.middleware.CachedTenantMiddleware',
+    'apps.core.middleware.RequestLogMiddleware',
+    'apps.core.middleware.RequestMetricsMiddleware',
+    'apps.core.middleware.ReplicaMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -61,10 +68,25 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.IdempotencyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# N+1 query detection: 'off', 'warn' (log) or 'raise' (fail the request)
+NPLUSONE_DETECTION = config('NPLUSONE_DETECTION', default='warn' if DEBUG else 'off')
+NPLUSONE_THRESHOLD = config('NPLUSONE_THRESHOLD', default=5, cast=int)
+
+if NPLUSONE_DETECTION != 'off':
+    MIDDLEWARE.append('apps.core.nplusone.NPlusOneMiddleware')
+
+# Set by educrowd/asgi.py. WhiteNoise is sync-only and would tie every ASGI
+# request to a thread, so under ASGI static files are served by nginx.
+ASGI_MODE = config('EDUCROWD_ASGI', default=False, cast=bool)
+
+if ASGI_MODE:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'educrowd.urls'
 
 TEMPLATES = [
@@ -84,6 +106,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'educrowd.wsgi.application'
+ASGI_APPLICATION = 'educrowd.asgi.application'
 
 # Database
 DATABASES = {
@@ -94,11 +117,42 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='postgres'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Keep connections across requests so the ones opened by the worker
+        # warm-up get used. Under ASGI each request runs in its own thread
+        # and would leave persistent connections behind, so they stay off.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0 if ASGI_MODE else 60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read replica. Safe reads are routed to it (see apps/core/routers.py);
+# without DB_REPLICA_HOST everything uses the primary. Any Postgres that
+# holds the same data can stand in, e.g. a second local server or the
+# primary itself. Tests read through the primary, as Django's test runner
+# can't keep a replica in sync within a test transaction.
+REPLICA_DATABASES = []
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST'),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES = ['replica']
+
+# Seconds a user reads from the primary after writing, to cover replica lag.
+REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=5, cast=int)
+
+# Per-process warm-up (see apps.core.warmup): how many tenant domain
+# lookups to load into the cache before a worker accepts requests.
+WARMUP_DOMAINS = config('WARMUP_DOMAINS', default=1000, cast=int)
+
 # Multi-tenancy settings
 DATABASE_ROUTERS = (
+    'apps.core.routers.ReplicaRouter',
     'django_tenants.routers.TenantSyncRouter',
 )
 
@@ -153,6 +207,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -198,6 +261,8 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
@@ -208,6 +273,30 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Queues by priority (see apps/core/taskbase.py). Tenant-fair default and
+# low tasks are spread over CELERY_TENANT_QUEUE_SHARDS queues by tenant, so
+# one tenant's bulk jobs only back up its own shard. A worker started
+# without -Q consumes all of them, round robin; give latency-sensitive work
+# its own workers with `celery -A educrowd worker -Q high`.
+CELERY_TENANT_QUEUE_SHARDS = config('CELERY_TENANT_QUEUE_SHARDS', default=8, cast=int)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = [Queue(name) for name in ('high', 'default', 'low')] + [
+    Queue(f'{priority}.{shard}')
+    for priority in ('default', 'low')  # taskbase.SHARDED_QUEUES
+    for shard in range(CELERY_TENANT_QUEUE_SHARDS)
+]
+# Take one task at a time, so a backed-up queue can't fill a worker's
+# prefetch buffer ahead of the other queues.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Port on which workers serve their task metrics; 0 turns it off.
+CELERY_METRICS_PORT = config('CELERY_METRICS_PORT', default=0, cast=int)
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-sessions': {
+        'task': 'apps.users.tasks.purge_expired_sessions',
+        'schedule': timedelta(hours=1),
+    },
+}
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -218,30 +307,57 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@educrowd.com')
 
 # Logging
+# configure_logging() applies LOGGING and then moves the handlers behind a
+# bounded queue drained by a background thread (see apps/core/logs.py).
+LOGGING_CONFIG = 'apps.core.logs.configure_logging'
+# Records buffered for the log writer; beyond this they are dropped.
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+# Fraction of DEBUG records kept per logger, as name=rate,name=rate. Only
+# records the logger's level lets through are sampled: the django loggers
+# below stop at INFO, so e.g. django.db.backends=0.01 also needs a
+# 'django.db.backends' entry at DEBUG (and DEBUG=True to log queries).
+LOG_SAMPLING = config(
+    'LOG_SAMPLING',
+    default='',
+    cast=lambda value: {
+        name.strip(): float(rate)
+        for name, rate in (item.split('=') for item in value.split(',') if item.strip())
+    }
+)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+        'json': {
+            '()': 'apps.core.logs.JSONFormatter',
         },
         'simple': {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'raw': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'formatter': config('LOG_CONSOLE_FORMAT', default='json'),
+        },
+        'traces': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'traces.jsonl',
+            'formatter': 'raw',
         },
     },
     'root': {
@@ -259,9 +375,28 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'educrowd.traces': {
+            'handlers': ['traces'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
+# Tracing (see apps/core/tracing.py)
+TRACING_ENABLED = config('TRACING_ENABLED', default=True, cast=bool)
+# Fraction of requests and tasks traced.
+TRACE_SAMPLE_RATE = config('TRACE_SAMPLE_RATE', default=1.0, cast=float)
+# Traces at least this slow are kept for /api/v1/core/traces/ ...
+TRACE_SLOW_MS = config('TRACE_SLOW_MS', default=500, cast=int)
+# ... and this fraction of them is written to logs/traces.jsonl.
+TRACE_EXPORT_RATE = config('TRACE_EXPORT_RATE', default=0.1, cast=float)
+# Spans recorded per trace; further spans are only counted.
+TRACE_MAX_SPANS = config('TRACE_MAX_SPANS', default=500, cast=int)
+# Recent and slow traces kept in memory, per process.
+TRACE_BUFFER_SIZE = config('TRACE_BUFFER_SIZE', default=200, cast=int)
+TRACE_SLOW_BUFFER_SIZE = config('TRACE_SLOW_BUFFER_SIZE', default=50, cast=int)
+
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -270,14 +405,35 @@ X_FRAME_OPTIONS = 'DENY'
 # Cache settings
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'apps.core.cache.TwoTierRedisCache',
         'LOCATION': config('REDIS_URL', default='redis://localhost:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # In-process L1 in front of Redis, invalidated over pub/sub.
+            'L1_MAX_ENTRIES': config('CACHE_L1_MAX_ENTRIES', default=10000, cast=int),
+            'L1_TIMEOUT': config('CACHE_L1_TIMEOUT', default=30, cast=int),
         }
     }
 }
 
+# Idempotency-Key handling (see apps/core/idempotency.py)
+# Seconds a response is kept for replay to retries with the same key.
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=24 * 60 * 60, cast=int)
+# Seconds a retry waits for the attempt still running before getting 409.
+IDEMPOTENCY_WAIT = config('IDEMPOTENCY_WAIT', default=10.0, cast=float)
+# Seconds after which a crashed attempt no longer blocks its retries.
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+
+# Batch API (see apps/core/batch.py)
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+# Threads running a batch's consecutive reads concurrently; 1 runs them in turn.
+BATCH_CONCURRENCY = config('BATCH_CONCURRENCY', default=4, cast=int)
+
+# Metrics settings
+# Bearer token Prometheus must send to scrape /api/v1/core/metrics/.
+# Without one, only staff users can read the metrics.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 # Session settings
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
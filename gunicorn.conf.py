@@ -0,0 +1,72 @@
+"""
+Gunicorn configuration for EduCrowd.
+
+Picked up automatically when gunicorn starts from the project root. The
+same file serves both deployments:
+
+    # WSGI, sync workers
+    gunicorn educrowd.wsgi:application
+
+    # ASGI, for the async endpoints
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn educrowd.asgi:application
+
+Every setting can be overridden with the environment variables below.
+
+The application is loaded once in the master and the workers are forked
+from it, sharing its memory copy-on-write. Each worker then warms up (see
+apps.core.warmup) before accepting connections. With preloading, a HUP
+restarts the workers but not the code; deploy new code with a full restart.
+"""
+import multiprocessing
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+_asgi = 'uvicorn' in worker_class
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Sync workers serve one request at a time, so they are oversubscribed to
+# cover time spent waiting on the database. Event-loop workers wait without
+# blocking, and one per core keeps them all busy.
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY',
+    multiprocessing.cpu_count() if _asgi else multiprocessing.cpu_count() * 2 + 1
+))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then to contain slow memory growth; the jitter
+# keeps them from restarting all at once.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# nginx in front terminates TLS and sets X-Forwarded-*.
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    # A connection opened while preloading the app must not be shared with
+    # the workers; each one opens its own during warm-up.
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    # Runs in the forked worker once the app is loaded, with or without
+    # preloading, and before the worker accepts connections.
+    from apps.core.warmup import warm_up
+    report = warm_up()
+    steps = ', '.join(f"{name} {step['duration_ms']:.0f}ms" for name, step in report['steps'].items())
+    if report['ready']:
+        worker.log.info('Worker %s warmed up: %s', worker.pid, steps)
+    else:
+        worker.log.warning('Worker %s warm-up incomplete, readiness will retry: %s', worker.pid, steps)
@@ -150,6 +150,24 @@ def test_redis_connection():
         print("Please ensure Redis is running and configured correctly")
         return False
 
+def test_startup_imports():
+    """Test that no heavy optional module is imported at startup."""
+    try:
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'profile_startup', '--with-urls', '--check', '--limit', '0'],
+            cwd=project_dir, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"❌ Startup import check failed: {(result.stderr or result.stdout).strip()}")
+            print("Import heavy integrations through apps.core.integrations")
+            return False
+        
+        print("✅ No heavy modules imported at startup")
+        return True
+    except Exception as e:
+        print(f"❌ Startup import check error: {e}")
+        return False
+
 def test_environment_file():
     """Test environment file configuration."""
     try:
@@ -184,6 +202,7 @@ def main():
         ("Model Test", test_models),
         ("Database Connection", test_database_connection),
         ("Redis Connection", test_redis_connection),
+        ("Startup Imports", test_startup_imports),
     ]
     
     passed = 0